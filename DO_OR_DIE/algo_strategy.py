@@ -1,9 +1,12 @@
 import gamelib
+from gamelib.batch import BatchSimulator
+from gamelib.simulation import Simulator
 import random
 import math
 import warnings
 from sys import maxsize
 import json
+import time
 
 #global enemyattack = []
 
@@ -17,7 +20,8 @@ Advanced strategy tips:
 
   - The GameState.map object can be manually manipulated to create hypothetical 
   board states. Though, we recommended making a copy of the map to preserve 
-  the actual current map state.
+  the actual current map state. game_state.fork() makes a cheap copy of the 
+  whole GameState to try hypothetical moves on.
 """
 
 
@@ -65,7 +69,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = gamelib.GameState(self.config, turn_state, self.path_cache)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(
             game_state.turn_number))
         # Comment or remove this line to enable warnings.
@@ -73,6 +77,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         self.enemyHP.append(game_state.enemy_health)
         self.starter_strategy(game_state)
         self.enemy_HP_last = game_state.enemy_health
+        gamelib.debug_write('Path cache: {}'.format(self.path_cache.stats()))
         
         game_state.submit_turn()
 
@@ -89,12 +94,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         scout_locs = [[15, 1],[12, 1]]
         
         # Check left half for upgraded turrets
-        left_upgraded_turret_found = False
-        for location in left_turret_locations:
-            unit = game_state.contains_stationary_unit(location)
-            if unit and unit.unit_type == TURRET and unit.upgraded:
-                left_upgraded_turret_found = True
-                break
+        left_upgraded_turret_found = len(game_state.game_map.units_of(unit_type=TURRET, upgraded=True, region=left_turret_locations)) > 0
 
         game_state.attempt_spawn(DEMOLISHER, demo_locs[0], 2)
         game_state.attempt_spawn(SUPPORT, support_locs[0], 1)
@@ -103,23 +103,124 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 
     def find_location(self, game_state):
+        if BatchSimulator.available():
+            self.search_attacks(game_state)
+            return
         
         scout_spawn_location_options =[[14,0],[15,1], [16,2], [17,3], [18,4], [19,5], [20,6], [21,7],[22,8],[23,9],[24,10]]
         
-        tup = self.least_damage_spawn_location(
+        best_location, best_losses = self.least_damage_spawn_location(
             game_state, scout_spawn_location_options)
         
-        if not tup:
-            self.send_scouts(game_state)
-            return
-        
-        best_location, best_damage = tup
-        
-        if best_damage >= 600:
+        # Scouts are not worth sending once the safest path costs as many of them as 600 damage to unshielded scouts,
+        # or when none of the locations reaches the enemy edge
+        if best_location is None or best_losses >= 600 / gamelib.GameUnit(SCOUT, game_state.config).max_health:
             self.left_right(game_state)
         else:
             self.send_scouts(game_state)
 
+    def search_attacks(self, game_state, confirmed=3, steps=5, time_budget=0.5):
+        """
+        Tries the attacks we can afford against the enemy board at once with the batch simulator.
+        The mixes are a grid over the number of demolishers and interceptors, from none up to as
+        many as we can afford in steps + 1 counts each, with the rest of the budget in scouts.
+        Every mix is tried from every free spawn location, then with the demolishers spawned apart
+        from the rest between the best locations, next to the fixed left_right attack.
+        Plans are simulated in chunks until time_budget seconds have passed, and the best few
+        are checked with the exact simulator before the best one is spawned.
+        """
+        start = time.time()
+        mp = game_state.get_resource(MP)
+        costs = dict((unit_type, game_state.type_cost(unit_type)[MP]) for unit_type in [SCOUT, DEMOLISHER, INTERCEPTOR])
+        if mp < min(costs.values()):
+            return
+
+        def grid(maximum):
+            return sorted(set(int(round(maximum * step / steps)) for step in range(steps + 1)))
+
+        mixes = []
+        for demolishers in grid(int(mp // costs[DEMOLISHER])):
+            left = mp - demolishers * costs[DEMOLISHER]
+            for interceptors in grid(int(left // costs[INTERCEPTOR])):
+                scouts = int((left - interceptors * costs[INTERCEPTOR]) // costs[SCOUT])
+                mix = [(unit_type, num) for unit_type, num in [(DEMOLISHER, demolishers), (INTERCEPTOR, interceptors), (SCOUT, scouts)] if num > 0]
+                if mix:
+                    mixes.append(mix)
+
+        locations = game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_LEFT) + \
+            game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_RIGHT)
+        locations = self.filter_blocked_locations(locations, game_state)
+        if not locations:
+            return
+        batch = BatchSimulator(game_state)
+
+        def screen(plans, chunk=128):
+            # Simulates the plans in chunks, and drops the ones left once the next chunk would run out of time
+            scores = []
+            for first in range(0, len(plans), chunk):
+                chunk_start = time.time()
+                result = batch.simulate(plans[first:first + chunk])
+                scores.extend(zip(result.breaches, result.damage_dealt))
+                if time.time() + (time.time() - chunk_start) - start > time_budget:
+                    break
+            return [(score, plan, game_state) for score, plan in zip(scores, plans)]
+
+        grid_candidates = screen([[(unit_type, location, num) for unit_type, num in mix] for location in locations for mix in mixes])
+
+        # Demolishers clearing the way from one of the best locations, with the rest of the mix from another
+        best_locations = []
+        for _, plan, _ in sorted(grid_candidates, key=lambda candidate: candidate[0], reverse=True):
+            if plan[0][1] not in best_locations:
+                best_locations.append(plan[0][1])
+        best_locations = best_locations[:4]
+        split_plans = []
+        for mix in mixes:
+            if mix[0][0] != DEMOLISHER or len(mix) == 1:
+                continue
+            for demolisher_location in best_locations:
+                for location in best_locations:
+                    if location != demolisher_location:
+                        split_plans.append([(DEMOLISHER, demolisher_location, mix[0][1])] + [(unit_type, location, num) for unit_type, num in mix[1:]])
+        candidates = grid_candidates
+
+        # The hard-coded attack, scored on a fork that has the support left_right spawns next to it
+        left_right_state = game_state.fork()
+        self.left_right(left_right_state)
+        left_right_plan = []
+        for location in [[2, 11], [15, 1]]:
+            for unit_type in [DEMOLISHER, SCOUT]:
+                num = sum(1 for unit in left_right_state.game_map[location] if unit.unit_type == unit_type) - \
+                    sum(1 for unit in game_state.game_map[location] if unit.unit_type == unit_type)
+                if num > 0:
+                    left_right_plan.append((unit_type, location, num))
+        if left_right_plan:
+            result = BatchSimulator(left_right_state).simulate([left_right_plan])
+            candidates.append(((result.breaches[0], result.damage_dealt[0]), left_right_plan, left_right_state))
+
+        if time.time() - start < time_budget:
+            candidates += screen(split_plans)
+
+        # The batch simulator does not re-path around destroyed structures, so the best plans are checked exactly
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        best_plan, best_score = None, None
+        for _, plan, state in candidates[:confirmed]:
+            if best_plan is not None and time.time() - start > time_budget:
+                break
+            if state is left_right_state:
+                result = Simulator(state).simulate()
+            else:
+                result = Simulator(state).simulate(plan)
+            score = (result.breaches[0], sum(result.structure_damage.values()))
+            if best_score is None or score > best_score:
+                best_plan, best_score = plan, score
+        gamelib.debug_write('Searched {} attacks in {:.2f}s, best {} scores {}'.format(len(candidates), time.time() - start, best_plan, best_score))
+
+        if best_plan is left_right_plan:
+            self.left_right(game_state)
+            return
+        for unit_type, location, num in best_plan:
+            game_state.attempt_spawn(unit_type, location, num)
+
     def starter_strategy(self, game_state):
         """
         For defense we will use a spread out layout.
@@ -189,14 +290,15 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def restall_low_health(self, game_state):
         low_health_threshold = 0.5
-        for i in range(28):
-            for j in range(28):
-                loc = [i, j]
-                if game_state.game_map.in_arena_bounds(loc):
-                    for unit in game_state.game_map[i, j]:
-                        if unit.health < unit.max_health * low_health_threshold and unit.unit_type == TURRET:
-                            game_state.attempt_remove(loc)
-                            self.reinforce_location(game_state, loc)
+        board = game_state.game_map.board
+        if board is not None:
+            locations = board.locations((board.structure_type == board.type_code(TURRET)) & (board.health < board.max_health * low_health_threshold))
+        else:
+            locations = [[unit.x, unit.y] for unit in game_state.game_map.structures() if unit.unit_type == TURRET and unit.health < unit.max_health * low_health_threshold]
+        # Same order as scanning the columns of the map
+        for loc in sorted(locations):
+            game_state.attempt_remove(loc)
+            self.reinforce_location(game_state, loc)
 
     def reinforce_location(self, game_state, loc):
         illegal_locs = [[0,13],[1,13],[26,13],[27,13]]
@@ -246,7 +348,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         best_location, _ = self.least_damage_spawn_location(
             game_state, scout_spawn_location_options)
         
-        if not best_location:
+        if best_location is None:
             game_state.attempt_spawn(SCOUT, [13, 0], 9)
             return
 
@@ -271,42 +373,47 @@ class AlgoStrategy(gamelib.AlgoCore):
                     gamelib.GameUnit(TURRET, game_state.config).damage_i
         return damage
 
-    def least_damage_spawn_location(self, game_state, location_options):
+    def least_damage_spawn_location(self, game_state, location_options, unit_type=None):
         """
         This function will help us guess which location is the safest to spawn moving units from.
         It gets the path the unit will take then checks locations on that path to 
-        estimate the path's damage risk.
+        estimate the path's damage risk, as the number of units of unit_type (scouts by default)
+        we expect to lose: the damage taken along the path over the health of one unit plus the
+        shield it collects on the way.
+        Returns (None, None) if no location can reach the enemy edge.
         """
         damages = []
         # Get the damage estimate each path will take
         if not location_options or not any(location_options):
-            return location_options
-
-        for location in location_options:
-            path = game_state.find_path_to_edge(location)
+            return None, None
+
+        paths = game_state.find_paths_to_edge(location_options)
+        # The damage enemy units can deal on every location, built once for all paths
+        threat = game_state.threat_map(0)
+        # The shield our supports give along a path adds to the health of every unit walking it
+        shield = game_state.shield_map(0)
+        health = gamelib.GameUnit(unit_type or SCOUT, game_state.config).max_health
+        for location, path in zip(location_options, paths):
             damage = 0
             illegal = True
             if path and any(path):
-                for path_location in path:
-                    if path_location in self.edge_locations: illegal = False
-                    for attacker in game_state.get_attackers(path_location, 0):
-                        if attacker.unit_type == TURRET:
-                            damage += attacker.damage_i
-            if illegal: damages.append(600)
+                illegal = not path.reaches_edge
+                damage = threat.path_damage(path) / (health + shield.path_shield(path))
+            if illegal: damages.append(float("inf"))
             else: damages.append(damage)
 
-        if not damages or not any(damages):
-            return None
+        # Paths that can not reach the edge are never the best, even if every other path is safe
+        if all(damage == float("inf") for damage in damages):
+            return None, None
         
-        return location_options[damages.index(min(damages))], min(damages)
+        best = damages.index(min(damages))
+        return location_options[best], damages[best]
 
     def detect_enemy_unit(self, game_state, unit_type=None, valid_x=None, valid_y=None):
         total_units = 0
-        for location in game_state.game_map:
-            if game_state.contains_stationary_unit(location):
-                for unit in game_state.game_map[location]:
-                    if unit.player_index == 1 and (unit_type is None or unit.unit_type == unit_type) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
-                        total_units += 1
+        for unit in game_state.game_map.units_of(1, unit_type):
+            if unit.stationary and (valid_x is None or unit.x in valid_x) and (valid_y is None or unit.y in valid_y):
+                total_units += 1
         return total_units
 
     def filter_blocked_locations(self, locations, game_state):
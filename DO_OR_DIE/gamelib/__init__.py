@@ -16,6 +16,20 @@ Investigating it is useful for advanced players interested in getting data from
 The Navigation class in navigation.py contains functions related to path-finding, which are used by GameState in pathing related functions. 
 Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
 
+The WavefrontEngine class in wavefront.py is an optional numpy backend for navigation.py. It computes the distance fields of all four edges at once. \n
+
+The BoardArrays class in board.py is an optional numpy view of the units on the map, one array per unit property. GameMap.board keeps it up to date. \n
+
+The ThreatMap class in threat.py holds the damage the enemies of one player can deal on every tile. GameState.threat_map builds it once per turn. \n
+
+The ShieldMap class in shield.py holds the shield the supports of one player give on every tile. GameState.shield_map builds it the same way. \n
+
+The Simulator class in simulation.py steps the action phase frame by frame on a fork of a GameState, to predict what planned deploys will do. \n
+
+The BatchSimulator class in batch.py is an optional numpy version of it, that screens many candidate attacks against the same board at once. \n
+
+tiles.py numbers the 420 tiles of the arena, and holds precomputed tables of their coordinates, neighbors, halves and edges. \n
+
 util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
 """
 
@@ -25,5 +39,5 @@ from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
 
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
+__all__ = ["algocore", "batch", "board", "game_state", "game_map", "navigation", "shield", "simulation", "threat", "unit", "tiles", "util", "wavefront"]
  
\ No newline at end of file
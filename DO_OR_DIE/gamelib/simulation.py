@@ -0,0 +1,348 @@
+from collections import namedtuple
+
+from .unit import GameUnit
+from .navigation import PathCache
+from .tiles import TILE_COUNT, TILE_X, TILE_Y, EDGE_BITS, tile_id
+
+UnitResult = namedtuple("UnitResult", ["unit_type", "player_index", "spawn_location", "count", "breached", "self_destructed", "destroyed", "damage_dealt", "last_location"])
+UnitResult.__doc__ = """What happened to a stack of mobile units during a simulated action phase, see Simulator.simulate
+
+Attributes :
+    * unit_type (string): The type of the units
+    * player_index (int): The player controlling the units, 0 for you 1 for the enemy
+    * spawn_location (list): The location the units were deployed on
+    * count (int): The number of units deployed
+    * breached (int): The number of units that reached their target edge
+    * self_destructed (int): The number of units that self destructed because they could not reach their target edge
+    * destroyed (int): The number of units destroyed by enemy attacks
+    * damage_dealt (float): The health the units took from enemy units and structures, overkill excluded
+    * last_location (list): The last location the units stood on
+"""
+
+SimulationResult = namedtuple("SimulationResult", ["units", "breaches", "player_damage", "structure_damage", "destroyed", "frames"])
+SimulationResult.__doc__ = """The outcome of a simulated action phase, see Simulator.simulate
+
+Attributes :
+    * units (list): A UnitResult for every stack of mobile units, in the order they were deployed
+    * breaches (list): The number of units of each player that reached their target edge, indexed by player index
+    * player_damage (list): The health each player loses to breaches, indexed by player index
+    * structure_damage (dict): The health every damaged structure lost, keyed by its (x, y) location
+    * destroyed (list): The locations of the structures destroyed, in the order they were destroyed
+    * frames (int): The number of frames simulated
+"""
+
+# Mobile units move one location whenever their accumulated speed reaches 1. Speeds like 0.25 add up exactly,
+# the tolerance only guards against configs with speeds that do not.
+_MOVE_EPSILON = 1e-9
+
+class _Stack:
+    """Mobile units of one type and player that were deployed together. They share a path, so they move, shield,
+    attack and self destruct together. Targets prefer the lowest health and dead units stay on the board until the
+    end of the frame, so attacks always land on one front unit while the others keep the same health.
+    """
+    __slots__ = ("unit", "info", "player_index", "spawn_tile", "spawned", "count", "front_health", "health", "tile", "target_edge",
+                 "path", "path_index", "progress", "steps", "shielded_by", "breached", "self_destructed", "destroyed", "damage_dealt")
+
+    def __init__(self, unit, info, tile, count, target_edge):
+        self.unit = unit
+        self.info = info
+        self.player_index = unit.player_index
+        self.spawn_tile = tile
+        self.spawned = count
+        self.count = count
+        self.front_health = unit.health
+        self.health = unit.health
+        self.tile = tile
+        self.target_edge = target_edge
+        self.path = None
+        self.path_index = 0
+        self.progress = 0
+        self.steps = 0
+        self.shielded_by = set()
+        self.breached = 0
+        self.self_destructed = 0
+        self.destroyed = 0
+        self.damage_dealt = 0
+
+    def result(self):
+        return UnitResult(self.unit.unit_type, self.player_index, [TILE_X[self.spawn_tile], TILE_Y[self.spawn_tile]], self.spawned,
+                          self.breached, self.self_destructed, self.destroyed, self.damage_dealt, [TILE_X[self.tile], TILE_Y[self.tile]])
+
+class _Structure:
+    __slots__ = ("unit", "player_index", "tile", "health", "damage_taken")
+
+    def __init__(self, unit, tile):
+        self.unit = unit
+        self.player_index = unit.player_index
+        self.tile = tile
+        self.health = unit.health
+        self.damage_taken = 0
+
+class Simulator:
+    """Steps the action phase of a turn frame by frame, to predict what a set of deploys will do
+
+    Each simulation runs on a fork of the game state, so the state itself is never changed. Every frame runs in this order:
+
+    1. Supports shield the mobile units of their player that are in their shieldRange, once per unit and support
+    2. Mobile units move along their path, one location whenever their accumulated speed reaches 1. A unit that
+       reaches its target edge breaches, a unit whose path ends anywhere else self destructs.
+    3. Structures, then mobile units, attack the target GameState.get_target would choose for them
+    4. Units and structures without health are removed. If a structure was destroyed, mobile units find new paths.
+
+    Mobile units deployed together on one location are simulated as a single stack, so the cost of a frame does not
+    depend on how many units were deployed. Paths come from GameState.find_paths_to_edge, and do not model the
+    alternating direction of units that are already moving when a structure is destroyed.
+
+    Attributes :
+        * game_state (:obj: GameState): The state the action phase starts from
+        * path_cache (:obj: PathCache): The paths found while re-pathing, shared by every simulation. 
+          The path_cache of game_state if it has one
+
+    """
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.path_cache = game_state.path_cache if game_state.path_cache is not None else PathCache()
+        self.__unit_information = dict((unit_information.get("shorthand"), unit_information) for unit_information in game_state.config["unitInformation"])
+
+    def simulate(self, deploys=None, max_frames=None):
+        """Simulates the action phase
+
+        Args:
+            deploys: A list of (unit_type, location, num) or (unit_type, location, num, player_index) tuples of mobile units to deploy.
+                player_index defaults to 0. Mobile units already on the map of the game state, for example from attempt_spawn, are deployed too.
+            max_frames: Stops the simulation after this many frames. Runs until every mobile unit is gone if None
+
+        Returns:
+            A SimulationResult
+
+        """
+        #Shield maps built on the game state are shared with every fork, until a support is destroyed
+        self.game_state.game_map.shield_map(0)
+        self.game_state.game_map.shield_map(1)
+        state = self.game_state.fork()
+        state.suppress_warnings(True)
+        state.path_cache = self.path_cache
+        game_map = state.game_map
+        self.__state = state
+
+        #Take the mobile units off the forked map, the simulation keeps its own stacks
+        planned = []
+        structures = [None] * TILE_COUNT
+        for tile in range(TILE_COUNT):
+            if game_map.occupied_mask[tile]:
+                for unit in game_map.tile_units(tile):
+                    if unit.stationary:
+                        structures[tile] = _Structure(unit, tile)
+                    else:
+                        planned.append((unit.unit_type, [unit.x, unit.y], 1, unit.player_index))
+                if structures[tile] is None:
+                    game_map.remove_unit([TILE_X[tile], TILE_Y[tile]])
+        for deploy in deploys or []:
+            unit_type, location, num = deploy[:3]
+            planned.append((unit_type, location, num, deploy[3] if len(deploy) > 3 else 0))
+        stacks = self.__stack(planned)
+        all_stacks = stacks
+
+        #The structures that can hit each tile, so only structures with a target in range look for one
+        covering = [[] for _ in range(TILE_COUNT)]
+        for structure in structures:
+            if structure is not None and structure.unit.damage_i > 0:
+                for tile in self.__attack_tiles(structure):
+                    covering[tile].append(structure)
+        mobile = [[] for _ in range(TILE_COUNT)]
+        for stack in stacks:
+            mobile[stack.tile].append(stack)
+        self.__structures = structures
+        self.__mobile = mobile
+        self.__damaged = set()
+        self.__find_paths(stacks)
+
+        breaches = [0, 0]
+        player_damage = [0, 0]
+        destroyed = []
+        shield_maps = [game_map.shield_map(0), game_map.shield_map(1)]
+        frame = 0
+        while stacks and (max_frames is None or frame < max_frames):
+            frame += 1
+
+            #Shielding
+            for stack in stacks:
+                shield_map = shield_maps[stack.player_index]
+                for support in shield_map.supports[stack.tile]:
+                    if support not in stack.shielded_by:
+                        stack.shielded_by.add(support)
+                        stack.front_health += shield_map.yields[support]
+                        stack.health += shield_map.yields[support]
+
+            #Movement
+            for stack in stacks:
+                stack.progress += stack.unit.speed
+                if stack.progress < 1 - _MOVE_EPSILON:
+                    continue
+                stack.progress -= 1
+                if stack.path_index + 1 >= len(stack.path):
+                    self.__self_destruct(stack)
+                    continue
+                mobile[stack.tile].remove(stack)
+                stack.path_index += 1
+                stack.tile = stack.path[stack.path_index]
+                stack.steps += 1
+                if EDGE_BITS[stack.tile] & (1 << stack.target_edge):
+                    breaches[stack.player_index] += stack.count
+                    player_damage[1 - stack.player_index] += stack.count * stack.info.get("playerBreachDamage", 1)
+                    stack.breached += stack.count
+                    stack.count = 0
+                    continue
+                mobile[stack.tile].append(stack)
+            stacks = [stack for stack in stacks if stack.count > 0]
+
+            #Attacks
+            attacking = set()
+            for stack in stacks:
+                for structure in covering[stack.tile]:
+                    if structure.player_index != stack.player_index:
+                        attacking.add(structure.tile)
+            for tile in sorted(attacking):
+                unit = structures[tile].unit
+                target = self.__find_target(tile, unit.attackRange, unit.player_index, unit.damage_i > 0, unit.damage_f > 0)
+                if target is not None:
+                    self.__hit(target, unit.damage_i, unit.damage_f, None)
+            for stack in stacks:
+                unit = stack.unit
+                target = self.__find_target(stack.tile, unit.attackRange, stack.player_index, unit.damage_i > 0, unit.damage_f > 0)
+                if target is not None:
+                    self.__hit(target, unit.damage_i * stack.count, unit.damage_f * stack.count, stack)
+
+            #Deaths
+            structures_destroyed = False
+            for structure in sorted(self.__damaged, key=lambda structure: structure.tile):
+                if structure.health <= 0 and structures[structure.tile] is structure:
+                    structures[structure.tile] = None
+                    if structure.unit.damage_i > 0:
+                        for tile in self.__attack_tiles(structure):
+                            covering[tile].remove(structure)
+                    location = [TILE_X[structure.tile], TILE_Y[structure.tile]]
+                    game_map.remove_unit(location)
+                    destroyed.append(location)
+                    structures_destroyed = True
+            for stack in stacks:
+                if stack.front_health <= 0:
+                    self.__kill(stack)
+            stacks = [stack for stack in stacks if stack.count > 0]
+            if structures_destroyed:
+                shield_maps = [game_map.shield_map(0), game_map.shield_map(1)]
+                self.__find_paths(stacks)
+
+        structure_damage = dict(((TILE_X[structure.tile], TILE_Y[structure.tile]), structure.damage_taken)
+                                for structure in sorted(self.__damaged, key=lambda structure: structure.tile) if structure.damage_taken > 0)
+        self.__state = self.__structures = self.__mobile = self.__damaged = None
+        return SimulationResult([stack.result() for stack in all_stacks], breaches, player_damage, structure_damage, destroyed, frame)
+
+    def __stack(self, planned):
+        """Groups planned deploys into stacks, one for every location, type and player
+        """
+        stacks = []
+        stacks_by_key = {}
+        for unit_type, location, num, player_index in planned:
+            tile = tile_id(location)
+            info = self.__unit_information.get(unit_type)
+            if info is None or info.get("unitCategory") == 0 or tile == -1 or self.__state.game_map.structure_mask[tile] or num < 1:
+                self.game_state.warn("Could not simulate {} {} at {}, expected mobile units on an empty location in the arena".format(num, unit_type, location))
+                continue
+            key = (tile, unit_type, player_index)
+            if key in stacks_by_key:
+                stacks_by_key[key].spawned += num
+                stacks_by_key[key].count += num
+                continue
+            x, y = TILE_X[tile], TILE_Y[tile]
+            unit = GameUnit(unit_type, self.game_state.config, player_index, None, x, y)
+            stack = _Stack(unit, info, tile, num, self.__state.get_target_edge([x, y]))
+            stacks_by_key[key] = stack
+            stacks.append(stack)
+        return stacks
+
+    def __attack_tiles(self, structure):
+        return self.__state.game_map.get_tile_ids_in_range([TILE_X[structure.tile], TILE_Y[structure.tile]], structure.unit.attackRange)
+
+    def __find_paths(self, stacks):
+        """Finds the path of every stack from its current location to its target edge
+        """
+        stacks_by_edge = {}
+        for stack in stacks:
+            stacks_by_edge.setdefault(stack.target_edge, []).append(stack)
+        for edge, edge_stacks in stacks_by_edge.items():
+            paths = self.__state.find_paths_to_edge([[TILE_X[stack.tile], TILE_Y[stack.tile]] for stack in edge_stacks], edge)
+            for stack, path in zip(edge_stacks, paths):
+                stack.path = path.ids
+                stack.path_index = 0
+
+    def __find_target(self, tile, attack_range, player_index, hits_mobile, hits_structures):
+        """The same target as GameState.get_target, among the stacks and structures of the simulation
+        """
+        if not hits_mobile and not hits_structures:
+            return None
+        structures = self.__structures
+        mobile = self.__mobile
+        structure_target = None
+        for tier in self.__state.game_map.get_target_tiers([TILE_X[tile], TILE_Y[tile]], attack_range, player_index):
+            mobile_target = None
+            find_structures = hits_structures and structure_target is None
+            for target in tier:
+                if hits_mobile:
+                    for stack in mobile[target]:
+                        if stack.player_index != player_index and (mobile_target is None or stack.front_health < mobile_target.front_health):
+                            mobile_target = stack
+                if find_structures:
+                    structure = structures[target]
+                    if structure is not None and structure.player_index != player_index and (structure_target is None or structure.health < structure_target.health):
+                        structure_target = structure
+            if mobile_target is not None:
+                return mobile_target
+            if structure_target is not None and not hits_mobile:
+                return structure_target
+        return structure_target
+
+    def __hit(self, target, damage_i, damage_f, attacker):
+        """Deals damage to a stack or a structure, and credits the health it took to the attacking stack
+        """
+        if isinstance(target, _Stack):
+            taken = min(damage_i, max(target.front_health, 0))
+            target.front_health -= damage_i
+        else:
+            taken = min(damage_f, max(target.health, 0))
+            target.health -= damage_f
+            target.damage_taken += taken
+            self.__damaged.add(target)
+        if attacker is not None:
+            attacker.damage_dealt += taken
+
+    def __self_destruct(self, stack):
+        """Removes a stack that cannot move on. If it moved far enough, every unit damages the enemies around it
+        """
+        info = stack.info
+        if stack.steps >= info.get("selfDestructStepsRequired", 0):
+            damage_i = info.get("selfDestructDamageWalker", 0) * stack.count
+            damage_f = info.get("selfDestructDamageTower", 0) * stack.count
+            for tile in self.__state.game_map.get_tile_ids_in_range([TILE_X[stack.tile], TILE_Y[stack.tile]], info.get("selfDestructRange", 0)):
+                structure = self.__structures[tile]
+                if structure is not None and structure.player_index != stack.player_index and damage_f > 0:
+                    self.__hit(structure, 0, damage_f, stack)
+                for target in self.__mobile[tile]:
+                    if target.player_index != stack.player_index and damage_i > 0:
+                        #Area damage hits every unit of the target stack
+                        stack.damage_dealt += min(damage_i, max(target.front_health, 0)) + (target.count - 1) * min(damage_i, max(target.health, 0))
+                        target.front_health -= damage_i
+                        target.health -= damage_i
+        stack.self_destructed += stack.count
+        stack.count = 0
+        self.__mobile[stack.tile].remove(stack)
+
+    def __kill(self, stack):
+        """Removes the dead units of a stack at the end of a frame. Only the front unit takes direct hits, area damage can kill them all
+        """
+        killed = stack.count if stack.health <= 0 else 1
+        stack.front_health = stack.health
+        stack.destroyed += killed
+        stack.count -= killed
+        if stack.count == 0:
+            self.__mobile[stack.tile].remove(stack)
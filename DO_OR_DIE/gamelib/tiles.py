@@ -0,0 +1,109 @@
+"""
+Precomputed tables for the 420 tiles of the diamond shaped arena.
+
+Every tile in the arena has an integer id between 0 and TILE_COUNT - 1. Ids go row by row
+from the bottom of the arena to the top, and from left to right within a row, which is the
+same order GameMap iterates in. Lists indexed by tile id replace the arena geometry in hot
+loops: bounds checks, neighbor lookups, halves and edges are all a single lookup.
+
+Attributes :
+    * ARENA_SIZE (int): The size of the arena
+    * HALF_ARENA (int): Half the size of the arena
+    * TILE_COUNT (int): The number of tiles in the arena
+    * TILE_X (tuple): The x coordinate of every tile id
+    * TILE_Y (tuple): The y coordinate of every tile id
+    * GRID_IDS (tuple): The tile id at index x * ARENA_SIZE + y, -1 for locations outside the arena
+    * NEIGHBORS (tuple): The ids of the neighbors of every tile id inside the arena, in the order up, down, right, left
+    * HALF (bytes): 0 for tiles in the bottom half of the arena, which player 0 builds on, and 1 for the top half
+    * EDGE_BITS (bytes): For every tile id, bit 1 << edge is set for each edge the tile is on, see GameMap.TOP_RIGHT and similar constants
+    * EDGE_IDS (tuple): The tile ids of each edge, in the order and with the locations of GameMap.get_edges
+
+"""
+
+ARENA_SIZE = 28
+HALF_ARENA = ARENA_SIZE // 2
+
+def _row_bounds(y):
+    """The first and last x coordinate of a row of the arena
+    """
+    row_size = y + 1 if y < HALF_ARENA else ARENA_SIZE - y
+    return HALF_ARENA - row_size, HALF_ARENA + row_size - 1
+
+def _build_tables():
+    tile_x = []
+    tile_y = []
+    grid_ids = [-1] * (ARENA_SIZE * ARENA_SIZE)
+    for y in range(ARENA_SIZE):
+        start_x, end_x = _row_bounds(y)
+        for x in range(start_x, end_x + 1):
+            grid_ids[x * ARENA_SIZE + y] = len(tile_x)
+            tile_x.append(x)
+            tile_y.append(y)
+
+    def grid_id(x, y):
+        if 0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE:
+            return grid_ids[x * ARENA_SIZE + y]
+        return -1
+
+    neighbors = []
+    for x, y in zip(tile_x, tile_y):
+        around = (grid_id(x, y + 1), grid_id(x, y - 1), grid_id(x + 1, y), grid_id(x - 1, y))
+        neighbors.append(tuple(tile for tile in around if tile != -1))
+
+    top_right = [grid_id(HALF_ARENA + num, ARENA_SIZE - 1 - num) for num in range(HALF_ARENA)]
+    top_left = [grid_id(HALF_ARENA - 1 - num, ARENA_SIZE - 1 - num) for num in range(HALF_ARENA)]
+    bottom_left = [grid_id(HALF_ARENA - 1 - num, num) for num in range(HALF_ARENA)]
+    bottom_right = [grid_id(HALF_ARENA + num, num) for num in range(HALF_ARENA)]
+    edge_ids = (tuple(top_right), tuple(top_left), tuple(bottom_left), tuple(bottom_right))
+    edge_bits = bytearray(len(tile_x))
+    for edge, tiles in enumerate(edge_ids):
+        for tile in tiles:
+            edge_bits[tile] |= 1 << edge
+
+    half = bytes(0 if y < HALF_ARENA else 1 for y in tile_y)
+    return tuple(tile_x), tuple(tile_y), tuple(grid_ids), tuple(neighbors), half, bytes(edge_bits), edge_ids
+
+TILE_X, TILE_Y, GRID_IDS, NEIGHBORS, HALF, EDGE_BITS, EDGE_IDS = _build_tables()
+TILE_COUNT = len(TILE_X)
+
+def tile_id(location):
+    """Gets the tile id of a location
+
+    Args:
+        location: A map location, [x, y]
+
+    Returns:
+        The tile id of the location, or -1 if it is outside the arena
+
+    """
+    x, y = location
+    if 0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE and x == int(x) and y == int(y):
+        return GRID_IDS[int(x) * ARENA_SIZE + int(y)]
+    return -1
+
+def tile_location(tile):
+    """Gets the location of a tile id
+
+    Args:
+        tile: A tile id
+
+    Returns:
+        The location of the tile, [x, y]
+
+    """
+    return [TILE_X[tile], TILE_Y[tile]]
+
+def path_ids(path):
+    """Gets the tile ids of a path
+
+    Args:
+        path: A Path, or a list of locations
+
+    Returns:
+        The tile id of every location of the path in the arena, in order
+
+    """
+    ids = getattr(path, "ids", None)
+    if ids is not None:
+        return ids
+    return [tile for tile in (tile_id(location) for location in path) if tile != -1]
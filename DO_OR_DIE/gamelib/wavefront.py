@@ -0,0 +1,120 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .tiles import TILE_X, TILE_Y, EDGE_IDS
+
+
+class WavefrontEngine:
+    """Computes the distance from every tile to each of the four edges at once.
+
+    The arena is held as a NumPy mask, padded by one tile on every side and flattened,
+    so moving a BFS frontier one step in any direction is a single shifted slice.
+    The frontiers of all four edges are expanded together, one vectorized step per
+    pathlength, which gives the same distances as ShortestPathFinder._validate.
+
+    Requires numpy, see WavefrontEngine.available().
+
+    Attributes :
+        * ARENA_SIZE (int): The size of the arena
+        * EDGE_COUNT (int): The number of edges, in the order TOP_RIGHT, TOP_LEFT, BOTTOM_LEFT, BOTTOM_RIGHT
+
+    """
+    ARENA_SIZE = 28
+    EDGE_COUNT = 4
+
+    def __init__(self):
+        if np is None:
+            raise ImportError("WavefrontEngine requires numpy")
+        size = self.ARENA_SIZE
+        width = size + 2
+        self._width = width
+
+        #Index of every tile id in a flattened (ARENA_SIZE, ARENA_SIZE) grid
+        self._grid_index = np.array(TILE_X, dtype=np.intp) * size + np.array(TILE_Y, dtype=np.intp)
+        arena = np.zeros(size * size, dtype=bool)
+        arena[self._grid_index] = True
+        self._arena = arena.reshape(size, size)
+
+        edges = np.zeros((self.EDGE_COUNT, size * size), dtype=bool)
+        for edge, tiles in enumerate(EDGE_IDS):
+            edges[edge, self._grid_index[list(tiles)]] = True
+        self._edges = edges.reshape(self.EDGE_COUNT, size, size)
+
+        self._padded = np.zeros((self.EDGE_COUNT, width, width), dtype=bool)
+        self._inner = (slice(None), slice(1, -1), slice(1, -1))
+
+    @staticmethod
+    def available():
+        """Returns True if numpy could be imported
+        """
+        return np is not None
+
+    def distance_tensor(self, structure_mask):
+        """Computes the distance fields of all four edges
+
+        Args:
+            structure_mask: A bytes-like object with 1 at the tile id of every location holding a structure, see GameMap.structure_mask
+
+        Returns:
+            An int16 array of shape (4, ARENA_SIZE, ARENA_SIZE). tensor[edge, x, y] is the number of steps
+            from [x, y] to the edge, 0 on the edge, and -1 for structures, tiles outside the arena and tiles cut off from the edge.
+
+        """
+        size = self.ARENA_SIZE
+        width = self._width
+        inner = self._inner
+        blocked = np.zeros(size * size, dtype=bool)
+        blocked[self._grid_index] = np.frombuffer(bytes(structure_mask), dtype=np.uint8)
+        blocked = blocked.reshape(size, size)
+        open_tiles = self._arena & ~blocked
+
+        padded_open = self._padded.copy()
+        padded_open[inner] = open_tiles
+        padded_open = padded_open.ravel()
+        frontier = self._padded.copy()
+        frontier[inner] = self._edges & open_tiles
+        frontier = frontier.ravel()
+        sources = frontier.copy()
+
+        #Tiles that have not been reached yet, and the number of steps each of them has waited
+        unreached = padded_open & ~frontier
+        waited = np.zeros(frontier.shape, dtype=np.int16)
+        reached = np.zeros_like(frontier)
+
+        #Only the middle rows can receive a step from all four directions
+        core = slice(width, -width)
+        unreached_core = unreached[core]
+        waited_core = waited[core]
+        while True:
+            step = reached[core]
+            np.logical_or(frontier[width - 1:-width - 1], frontier[width + 1:-width + 1], out=step)
+            step |= frontier[:-2 * width]
+            step |= frontier[2 * width:]
+            step &= unreached_core
+            if not step.any():
+                break
+            unreached_core ^= step
+            waited_core += unreached_core
+            frontier, reached = reached, frontier
+
+        #A tile reached on step n waited n - 1 steps
+        tensor = waited + 1
+        tensor[unreached] = -1
+        tensor[sources] = 0
+        tensor[~padded_open] = -1
+        return tensor.reshape(self.EDGE_COUNT, width, width)[inner]
+
+    def tile_field(self, tensor, edge):
+        """Gets the distance field of one edge from a distance tensor, indexed by tile id
+
+        Args:
+            tensor: A tensor returned by distance_tensor
+            edge: The edge, TOP_RIGHT, TOP_LEFT, BOTTOM_LEFT or BOTTOM_RIGHT
+
+        Returns:
+            A list with the number of steps from every tile id to the edge, see tiles.py
+
+        """
+        return tensor[edge].ravel()[self._grid_index].tolist()
@@ -18,7 +18,8 @@ Advanced strategy tips:
 
   - The GameState.map object can be manually manipulated to create hypothetical 
   board states. Though, we recommended making a copy of the map to preserve 
-  the actual current map state.
+  the actual current map state. game_state.fork() makes a cheap copy of the 
+  whole GameState to try hypothetical moves on.
 """
 
 import numpy as np
@@ -34,10 +35,9 @@ def compute_damage(args):
     path = game_state.find_path_to_edge(location)
     damage = 0
     if path:
-        for path_location in path:
-            for attacker in game_state.get_attackers(path_location, 0):
-                if attacker.unit_type == TURRET:
-                    damage += attacker.damage_i
+        for attacker, tiles in game_state.get_attackers_along(path, 0):
+            if attacker.unit_type == TURRET:
+                damage += attacker.damage_i * tiles
     
     return [location, damage]
 
@@ -96,7 +96,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = gamelib.GameState(self.config, turn_state, self.path_cache)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(
             game_state.turn_number))
         # Comment or remove this line to enable warnings.
@@ -226,21 +226,22 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def restall_low_health(self, game_state):
         low_health_threshold = 0.7
-        for i in range(28):
-            for j in range(28):
-                loc = [i, j]
-                if game_state.game_map.in_arena_bounds(loc):
-                    for unit in game_state.game_map[i, j]:
-                        if unit.health < unit.max_health * low_health_threshold and unit.unit_type == TURRET:
-                            game_state.attempt_remove(loc)
-                            self.reinforce_location(game_state, loc)
+        board = game_state.game_map.board
+        if board is not None:
+            locations = board.locations((board.structure_type == board.type_code(TURRET)) & (board.health < board.max_health * low_health_threshold))
+        else:
+            locations = [[unit.x, unit.y] for unit in game_state.game_map.structures() if unit.unit_type == TURRET and unit.health < unit.max_health * low_health_threshold]
+        # Same order as scanning the columns of the map
+        for loc in sorted(locations):
+            game_state.attempt_remove(loc)
+            self.reinforce_location(game_state, loc)
 
 
     def remove_all(self, game_state):
-        for i in range(28):
-            for j in range(28):
-                loc = [i, j]
-                game_state.attempt_remove(loc)
+        # Only our structures can be removed, in the same order as scanning the columns of the map
+        locations = sorted([unit.x, unit.y] for unit in game_state.game_map.units_of(0, [WALL, SUPPORT, TURRET]))
+        if locations:
+            game_state.attempt_remove(locations)
 
     def sucidal_scouts(self, game_state):
         l = [[1,12],[2,11],[3,10],[4,9],[5,8],[6,7],[7,6],[8,5],[9,4],[10,3],[11,2],[12,1],[13,0]]
@@ -293,13 +294,13 @@ class AlgoStrategy(gamelib.AlgoCore):
         
         neigh.append([i, j])
         
-        path = game_state.find_path_to_edge(self.last_spawning_loc)
+        impacts = game_state.path_impact(self.last_spawning_loc, neigh)
 
-        if path:
-            for n in neigh:
+        if impacts:
+            for n, impact in zip(neigh, impacts):
                 if game_state.get_resource(MP) < game_state.type_cost(TURRET)[MP]:
                     break
-                if n in path:
+                if impact is None or impact.changed:
                     continue
                 game_state.attempt_spawn(TURRET, n)
             # game_state.attempt_spawn(TURRET,n)
@@ -341,11 +342,13 @@ class AlgoStrategy(gamelib.AlgoCore):
 
 
 
-    def least_damage_spawn_location(self, game_state, location_options):
+    def least_damage_spawn_location(self, game_state, location_options, unit_type=None):
         """
         This function will help us guess which location is the safest to spawn moving units from.
         It gets the path the unit will take then checks locations on that path to 
-        estimate the path's damage risk.
+        estimate the path's damage risk, as the number of units of unit_type (scouts by default)
+        we expect to lose: the damage taken along the path over the health of one unit plus the
+        shield it collects on the way.
 
 
         EXPENSIVE METHOD
@@ -355,14 +358,18 @@ class AlgoStrategy(gamelib.AlgoCore):
         if not location_options or not any(location_options):
             return location_options
 
-        for location in location_options:
-            path = game_state.find_path_to_edge(location)
+        # Units that can not reach the enemy edge would self destruct
+        location_options = [location for location in location_options if game_state.can_reach_edge(location)]
+        paths = game_state.find_paths_to_edge(location_options)
+        # The damage enemy units can deal on every location, built once for all paths
+        threat = game_state.threat_map(0)
+        # The shield our supports give along a path adds to the health of every unit walking it
+        shield = game_state.shield_map(0)
+        health = gamelib.GameUnit(unit_type or SCOUT, game_state.config).max_health
+        for location, path in zip(location_options, paths):
             damage = 0
             if path and any(path):
-                for path_location in path:
-                    for attacker in game_state.get_attackers(path_location, 0):
-                        if attacker.unit_type == TURRET:
-                            damage += attacker.damage_i
+                damage = threat.path_damage(path) / (health + shield.path_shield(path))
             damages.append(damage)
             if damage == 0:
                 return location, damage
@@ -383,13 +390,7 @@ class AlgoStrategy(gamelib.AlgoCore):
             Dictionary with operation statistics
         """
         # Step 1: Identify and remove all existing structures
-        existing_structures = []
-        for x in range(game_state.ARENA_SIZE):
-            for y in range(game_state.HALF_ARENA):
-                location = [x, y]
-                if (game_state.game_map.in_arena_bounds(location) and 
-                        game_state.contains_stationary_unit(location)):
-                    existing_structures.append(location)
+        existing_structures = sorted([unit.x, unit.y] for unit in game_state.game_map.units_of(0, [WALL, SUPPORT, TURRET]))
         
         removed_count = game_state.attempt_remove(existing_structures)
         
@@ -431,11 +432,9 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def detect_enemy_unit(self, game_state, unit_type=None, valid_x=None, valid_y=None):
         total_units = 0
-        for location in game_state.game_map:
-            if game_state.contains_stationary_unit(location):
-                for unit in game_state.game_map[location]:
-                    if unit.player_index == 1 and (unit_type is None or unit.unit_type == unit_type) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
-                        total_units += 1
+        for unit in game_state.game_map.units_of(1, unit_type):
+            if unit.stationary and (valid_x is None or unit.x in valid_x) and (valid_y is None or unit.y in valid_y):
+                total_units += 1
         return total_units
     
     def stall_with_interceptors(self, game_state):
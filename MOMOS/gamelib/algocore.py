@@ -1,6 +1,7 @@
 import json
 
 from .game_state import GameState
+from .navigation import PathCache
 from .util import get_command, debug_write, BANNER_TEXT, send_command
 
 class AlgoCore(object):
@@ -10,10 +11,12 @@ class AlgoCore(object):
 
     Attributes :
         * config (JSON): json object containing information about the game
+        * path_cache (:obj: PathCache): Paths found on earlier turns, pass it to GameState to reuse them
 
     """
     def __init__(self):
         self.config = None
+        self.path_cache = PathCache()
 
     def on_game_start(self, config):
         """
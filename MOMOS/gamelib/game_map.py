@@ -1,6 +1,75 @@
+import copy
 import math
+import random
 from .unit import GameUnit
 from .util import debug_write
+from .board import BoardArrays
+from .threat import ThreatMap
+from .shield import ShieldMap
+from .tiles import GRID_IDS, TILE_COUNT, TILE_X, TILE_Y, HALF_ARENA, EDGE_IDS, tile_id
+
+# One random 64 bit key per tile id. The layout hash of a map is the xor of the keys of every tile with a structure.
+# The seed is fixed so equal layouts hash the same way on every turn.
+_layout_random = random.Random(1347)
+_LAYOUT_KEYS = [_layout_random.getrandbits(64) for _ in range(TILE_COUNT)]
+
+# Range stencils keyed by (radius, getHitRadius). Each holds the offsets in range of a tile,
+# and the tile ids in range of every tile id once they have been clipped against the arena.
+# Attack ranges use a getHitRadius of None: they reach every location at most radius away, like GameState.get_attackers.
+_range_stencils = {}
+
+class _RangeStencil:
+    def __init__(self, radius, hit_radius):
+        search_radius = math.ceil(radius)
+        self.offsets = []
+        for i in range(-search_radius, search_radius + 1):
+            for j in range(-search_radius, search_radius + 1):
+                # Same distance as distance_between_locations, so results match the unclipped search exactly
+                distance = math.sqrt(i ** 2 + j ** 2)
+                if distance <= radius if hit_radius is None else distance < radius + hit_radius:
+                    self.offsets.append((i, j))
+        self.tiles = [None] * TILE_COUNT
+
+    def tiles_in_range(self, tile):
+        tiles = self.tiles[tile]
+        if tiles is None:
+            x = TILE_X[tile]
+            y = TILE_Y[tile]
+            tiles = tuple(tile_id([x + i, y + j]) for i, j in self.offsets)
+            tiles = tuple(tile for tile in tiles if tile != -1)
+            self.tiles[tile] = tiles
+        return tiles
+
+# Target stencils keyed by (radius, getHitRadius, player_index), see GameMap.get_target_tiers
+_target_stencils = {}
+
+class _TargetStencil:
+    def __init__(self, range_stencil, player_index):
+        self.range_stencil = range_stencil
+        self.player_index = player_index
+        self.tiers = [None] * TILE_COUNT
+
+    def tiers_in_range(self, tile):
+        tiers = self.tiers[tile]
+        if tiers is None:
+            x = TILE_X[tile]
+            y = TILE_Y[tile]
+            # Players 0 and 1 prefer targets closer to their own side, lower and higher y
+            direction = 1 if self.player_index == 0 else -1
+            keys = {}
+            for order, target in enumerate(self.range_stencil.tiles_in_range(tile)):
+                target_x = TILE_X[target]
+                target_y = TILE_Y[target]
+                distance = math.sqrt((target_x - x) ** 2 + (target_y - y) ** 2)
+                keys[target] = (distance, target_y * direction, -abs(HALF_ARENA - 0.5 - target_x), order)
+            tiers = []
+            for target in sorted(keys, key=keys.get):
+                if not tiers or keys[tiers[-1][-1]][0] != keys[target][0]:
+                    tiers.append([])
+                tiers[-1].append(target)
+            tiers = tuple(tuple(tier) for tier in tiers)
+            self.tiers[tile] = tiers
+        return tiers
 
 class GameMap:
     """Holds data about the current game map and provides functions
@@ -9,6 +78,14 @@ class GameMap:
     game_map[x, y] will return a list of Units located at that location, 
     or an empty list if there are no units at the location
 
+    Iterating over the map yields every location in the arena, row by row from the bottom.
+    Iterations are independent of each other, so loops over the map can be nested.
+    occupied_tiles and structures only visit the locations that hold units, and units_of looks units up
+    in an index by player, type and upgrade state.
+
+    fork returns a cheap copy of the map for trying out hypothetical changes. The two maps share
+    their unit lists and units until one of them changes a location, see edit_units.
+
     Attributes :
         * config (JSON): Contains information about the current game rules
         * enable_warnings (bool): If true, debug messages for game_map functions will print out
@@ -18,6 +95,15 @@ class GameMap:
         * TOP_LEFT (int): A constant that represents the top left edge
         * BOTTOM_LEFT (int): Hidden challenge! Can you guess what this constant represents???
         * BOTTOM_RIGHT (int): A constant that represents the bottom right edge
+        * structure_mask (bytearray): 1 at the tile id of every location holding a structure, see tiles.py.
+          It is kept up to date by add_unit, remove_unit and item assignment, so lists returned by
+          game_map[x, y] should not be edited directly.
+        * occupied_mask (bytearray): 1 at the tile id of every location holding at least one unit, kept up to date like structure_mask
+        * layout_version (int): Incremented every time a location gains or loses its structure
+        * layout_hash (int): A 64 bit hash of the locations holding structures. Maps with the same layout have the same hash, on any turn.
+        * board (:obj: BoardArrays): The units on the map as numpy arrays, for queries over the whole board. None if numpy is not installed.
+          Built the first time it is used, and kept in sync with the unit lists after that. Units changed through edit_units
+          and upgraded units are updated automatically, after changing the health or removal state of a unit directly, call unit_changed(unit).
 
     """
     def __init__(self, config):
@@ -36,7 +122,41 @@ class GameMap:
         self.BOTTOM_LEFT = 2
         self.BOTTOM_RIGHT = 3
         self.__map = self.__empty_grid()
-        self.__start = [13,0]
+        self.structure_mask = bytearray(TILE_COUNT)
+        self.occupied_mask = bytearray(TILE_COUNT)
+        self.layout_version = 0
+        self.layout_hash = 0
+        self._layout_listeners = []
+        self.__occupied = set()
+        self.__board = None
+        #Tile ids mapped to (player_index, unit_type, upgraded) keys and back, see units_of. Built on first use
+        self.__unit_index = None
+        self.__tile_keys = None
+        #The ThreatMap of each defending player, see threat_map. Built on first use, then updated in place.
+        #The attackers stamped onto them from every tile id, as (player_index, attackRange, damage_i, damage_f, count) tuples
+        self.__threat_maps = [None, None]
+        self.__threat_records = None
+        self.__threats_shared = False
+        #The ShieldMap of each player, see shield_map. Kept up to date like the threat maps, 
+        #from the supports on every tile id as (player_index, shieldRange, shield) tuples
+        self.__shield_maps = [None, None]
+        self.__shield_records = None
+        self.__shields_shared = False
+        #The attackers that can hit every tile id, per defending player, see attackers. Built on first use, then updated in place.
+        #The attackers indexed from every tile id, as (unit, player_index, attackRange) tuples
+        self.__attacker_lists = None
+        self.__attacker_sources = None
+        self.__attackers_shared = False
+        #Tile ids whose units changed since the board, the unit index and the threat maps were last updated.
+        #Only tracked once one of them was built
+        self.__changed_tiles = set()
+        self.__track_changes = False
+        #Tile ids whose unit list and units belong to this map alone. None while nothing is shared with a fork
+        self.__owned_tiles = None
+        #The tile ids of upgraded units, appended by GameUnit.upgrade. Shared with forks, which share the units,
+        #so every map marks the tiles it has not read yet as changed
+        self.__upgrade_log = []
+        self.__upgrade_log_read = 0
     
     def __getitem__(self, location):
         if len(location) == 2 and self.in_arena_bounds(location):
@@ -46,26 +166,65 @@ class GameMap:
 
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
-            self.__map[location[0]][location[1]] = val
+            x, y = location
+            tile = tile_id(location)
+            self.__map[x][y] = val
+            for unit in val:
+                unit._upgrade_log = self.__upgrade_log
+            if val:
+                self.__occupied.add(tile)
+            else:
+                self.__occupied.discard(tile)
+            self.occupied_mask[tile] = 1 if val else 0
+            self._tile_changed(tile)
+            self._set_blocked(tile, any(unit.stationary for unit in val))
             return
         self._invalid_coordinates(location)
 
+    def tile_units(self, tile):
+        """Gets the units on a tile id, like game_map[x, y] without checking a location. See tiles.py
+
+        Args:
+            tile: A tile id
+
+        Returns:
+            The list of GameUnits on the tile. It should not be edited, see edit_units
+
+        """
+        return self.__map[TILE_X[tile]][TILE_Y[tile]]
+
     def __iter__(self):
-        self.__start = [13,0]
-        return self
-    
-    def __next__(self):
-        location = self.__start
-        if location == [15,27]:
-            raise StopIteration
-        new_location = [location[0]+1, location[1]]
-        while not self.in_arena_bounds(new_location) and not location == [14,27]:
-            if new_location[0] == self.ARENA_SIZE:
-                new_location = [0, new_location[1]+1]
-            else:
-                new_location = [new_location[0]+1, new_location[1]]
-        self.__start = new_location
-        return location 
+        for tile in range(TILE_COUNT):
+            yield [TILE_X[tile], TILE_Y[tile]]
+
+    def occupied_tiles(self):
+        """Gets the locations that hold at least one unit
+
+        Returns:
+            A list of locations, in the order the map is iterated in
+
+        """
+        return [[TILE_X[tile], TILE_Y[tile]] for tile in sorted(self.__occupied)]
+
+    def structures(self, player_index=None):
+        """Gets the structures on the map
+
+        Args:
+            player_index: The index corresponding to the player controlling the structures, 0 for you 1 for the enemy. Both players if None
+
+        Returns:
+            A list of the structure GameUnits, in the order the map is iterated in
+
+        """
+        structure_mask = self.structure_mask
+        structures = []
+        for tile in sorted(self.__occupied):
+            if not structure_mask[tile]:
+                continue
+            for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]:
+                if unit.stationary and (player_index is None or unit.player_index == player_index):
+                    structures.append(unit)
+        return structures
 
     def __empty_grid(self):
         grid = []
@@ -88,20 +247,7 @@ class GameMap:
             True if the location is on the board, False otherwise
         
         """
-        x, y = location
-        half_board = self.HALF_ARENA
-
-        row_size = y + 1
-        startx = half_board - row_size
-        endx = startx + (2 * row_size) - 1
-        top_half_check = (y < self.HALF_ARENA and x >= startx and x <= endx)
-
-        row_size = (self.ARENA_SIZE - 1 - y) + 1
-        startx = half_board - row_size
-        endx = startx + (2 * row_size) - 1
-        bottom_half_check = (y >= self.HALF_ARENA and x >= startx and x <= endx)
-
-        return bottom_half_check or top_half_check
+        return tile_id(location) != -1
 
     def get_edge_locations(self, quadrant_description):
         """Takes in an edge description and returns a list of locations.
@@ -127,35 +273,16 @@ class GameMap:
             A list with four lists inside of it of locations corresponding to the four edges.
             [0] = top_right, [1] = top_left, [2] = bottom_left, [3] = bottom_right.
         """
-        top_right = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA + num
-            y = self.ARENA_SIZE - 1 - num
-            top_right.append([int(x), int(y)])
-        top_left = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA - 1 - num
-            y = self.ARENA_SIZE - 1 - num
-            top_left.append([int(x), int(y)])
-        bottom_left = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA - 1 - num
-            y = num
-            bottom_left.append([int(x), int(y)])
-        bottom_right = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA + num
-            y = num
-            bottom_right.append([int(x), int(y)])
-        return [top_right, top_left, bottom_left, bottom_right]
+        return [[[TILE_X[tile], TILE_Y[tile]] for tile in edge] for edge in EDGE_IDS]
     
-    def add_unit(self, unit_type, location, player_index=0):
+    def add_unit(self, unit_type, location, player_index=0, num=1):
         """Add a single GameUnit to the map at the given location.
 
         Args:
             unit_type: The type of the new unit. Use the constants provided in algo_strategy.
             location: A list of two integers representing the [x,y] coordinate of the new unit
             player_index: The index corresponding to the player controlling the new unit, 0 for you 1 for the enemy
+            num: The number of mobile units to add, each its own GameUnit. Structures are added once.
 
         This function does not affect your turn and only changes the data stored in GameMap. The intended use of this function
         is to allow you to create arbitrary gamestates. Using this function on the game_map provided with game_state will 
@@ -163,15 +290,442 @@ class GameMap:
         """
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
+            return
         if player_index < 0 or player_index > 1:
             self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
 
         x, y = location
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
-        if not new_unit.stationary:
-            self.__map[x][y].append(new_unit)
-        else:
-            self.__map[x][y] = [new_unit]
+        if new_unit.stationary:
+            self.__map[x][y] = []
+            num = 1
+        self._place_unit(new_unit, num)
+
+    def _place_unit(self, unit, num=1):
+        """Appends an existing GameUnit to the list at its location and records it in the structure mask.
+        Used by add_unit and by GameState when parsing the units of a turn.
+        With num > 1 the unit is appended together with num - 1 copies of it, so every unit can be changed on its own.
+        """
+        tile = GRID_IDS[unit.x * self.ARENA_SIZE + unit.y]
+        unit._upgrade_log = self.__upgrade_log
+        units = self.__own_tile(tile)
+        units.append(unit)
+        if num > 1:
+            units.extend([copy.copy(unit) for _ in range(num - 1)])
+        self.__occupied.add(tile)
+        self.occupied_mask[tile] = 1
+        self._tile_changed(tile)
+        if unit.stationary:
+            self._set_blocked(tile, True)
+
+    def __own_tile(self, tile):
+        """Gets the unit list of a tile id for changing it in place. Lists shared with a fork are copied first, with their units
+        """
+        x = TILE_X[tile]
+        y = TILE_Y[tile]
+        units = self.__map[x][y]
+        if self.__owned_tiles is not None and tile not in self.__owned_tiles:
+            units = [copy.copy(unit) for unit in units]
+            self.__map[x][y] = units
+            self.__owned_tiles.add(tile)
+        return units
+
+    def edit_units(self, location):
+        """Gets the units at a location for changing them in place, for example their health or upgrade state.
+        Units shared with a forked map are copied first, so the change only affects this map. The board arrays and the unit index are updated before their next use.
+
+        Args:
+            location: A map location
+
+        Returns:
+            The list of GameUnits at the location. Use add_unit and remove_unit to add or remove units.
+
+        """
+        tile = tile_id(location)
+        if tile == -1:
+            self._invalid_coordinates(location)
+            return
+        self._tile_changed(tile)
+        return self.__own_tile(tile)
+
+    def fork(self):
+        """Creates a copy of the map for trying out hypothetical changes.
+        Forking is cheap: unit lists and units are shared, and a location is copied only when one of the two maps changes it.
+
+        Returns:
+            A new GameMap with the same units. add_unit, remove_unit, item assignment and edit_units on either map do not affect the other.
+            Layout listeners are not copied.
+
+        """
+        self.__flush_changes()
+        fork = GameMap.__new__(GameMap)
+        fork.__dict__.update(self.__dict__)
+        fork.__map = [column[:] for column in self.__map]
+        fork.structure_mask = bytearray(self.structure_mask)
+        fork.occupied_mask = bytearray(self.occupied_mask)
+        fork._layout_listeners = []
+        fork.__occupied = set(self.__occupied)
+        fork.__board = self.__board.copy() if self.__board is not None else None
+        if self.__unit_index is not None:
+            fork.__unit_index = dict((key, set(tiles)) for key, tiles in self.__unit_index.items())
+            fork.__tile_keys = self.__tile_keys[:]
+        #Threat maps are shared until one of the two maps updates them
+        fork.__threat_maps = self.__threat_maps[:]
+        self.__threats_shared = self.__threat_records is not None
+        fork.__threats_shared = self.__threats_shared
+        fork.__shield_maps = self.__shield_maps[:]
+        self.__shields_shared = self.__shield_records is not None
+        fork.__shields_shared = self.__shields_shared
+        self.__attackers_shared = self.__attacker_lists is not None
+        fork.__attackers_shared = self.__attackers_shared
+        fork.__changed_tiles = set()
+        #Every unit list is shared now, so both maps copy a location before changing it
+        self.__owned_tiles = set()
+        fork.__owned_tiles = set()
+        return fork
+
+    def _set_blocked(self, tile, blocked):
+        """Updates the structure mask of a tile id, and the layout version if it changed
+        """
+        if self.structure_mask[tile] != blocked:
+            self.structure_mask[tile] = blocked
+            self.layout_version += 1
+            self.layout_hash ^= _LAYOUT_KEYS[tile]
+            for listener in self._layout_listeners:
+                listener(self, tile, blocked)
+
+    @property
+    def board(self):
+        self.__flush_changes()
+        if self.__board is None:
+            if not BoardArrays.available():
+                return None
+            self.__board = BoardArrays(self.config)
+            self.__board.fill(self.__all_units())
+            self.__track_changes = True
+        return self.__board
+
+    def units_of(self, player_index=None, unit_type=None, upgraded=None, region=None):
+        """Gets the units of a player, type and upgrade state. 
+        Units are looked up in an index that is kept up to date with the map, so this takes time in the number
+        of matching locations instead of the size of the arena.
+
+        Args:
+            player_index: The index corresponding to the player controlling the units, 0 for you 1 for the enemy. Both players if None
+            unit_type: A unit type or a list of unit types. Every type if None
+            upgraded: True for upgraded units only, False for units that are not upgraded. Both if None
+            region: A list of locations. Only units on these locations are returned, the whole map if None
+
+        Returns:
+            A list of GameUnits, in the order the map is iterated in
+
+        """
+        if unit_type is not None and not isinstance(unit_type, (list, tuple, set)):
+            unit_type = [unit_type]
+        tiles = set()
+        for (key_player_index, key_unit_type, key_upgraded), key_tiles in self.__units_index().items():
+            if ((player_index is None or key_player_index == player_index) and (unit_type is None or key_unit_type in unit_type)
+                    and (upgraded is None or key_upgraded == upgraded)):
+                tiles |= key_tiles
+        if region is not None:
+            tiles.intersection_update(tile_id(location) for location in region)
+
+        units = []
+        for tile in sorted(tiles):
+            for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]:
+                if ((player_index is None or unit.player_index == player_index) and (unit_type is None or unit.unit_type in unit_type)
+                        and (upgraded is None or unit.upgraded == upgraded)):
+                    units.append(unit)
+        return units
+
+    def __units_index(self):
+        self.__flush_changes()
+        if self.__unit_index is None:
+            self.__unit_index = {}
+            self.__tile_keys = [()] * TILE_COUNT
+            for tile in self.__occupied:
+                self.__index_tile(tile)
+            self.__track_changes = True
+        return self.__unit_index
+
+    def __index_tile(self, tile):
+        """Moves a tile id to the index keys of the units now on it
+        """
+        index = self.__unit_index
+        for key in self.__tile_keys[tile]:
+            index[key].discard(tile)
+        keys = tuple(set((unit.player_index, unit.unit_type, unit.upgraded) for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]))
+        for key in keys:
+            if key not in index:
+                index[key] = set()
+            index[key].add(tile)
+        self.__tile_keys[tile] = keys
+
+    def __flush_changes(self):
+        """Updates the board arrays, the unit index, the threat and shield maps and the attacker lists for the tiles that changed since they were last used
+        """
+        upgrade_log = self.__upgrade_log
+        if len(upgrade_log) > self.__upgrade_log_read:
+            for tile in upgrade_log[self.__upgrade_log_read:]:
+                self._tile_changed(tile)
+            self.__upgrade_log_read = len(upgrade_log)
+        changed_tiles = self.__changed_tiles
+        if not changed_tiles:
+            return
+        if self.__board is not None:
+            #Large changes, like a new turn being parsed, are cheaper to write all at once
+            if len(changed_tiles) > 32:
+                self.__board.fill(self.__all_units())
+            else:
+                for tile in changed_tiles:
+                    self.__board.update_tile(tile, self.__map[TILE_X[tile]][TILE_Y[tile]])
+        if self.__unit_index is not None:
+            for tile in changed_tiles:
+                self.__index_tile(tile)
+        if self.__threat_records is not None:
+            for tile in changed_tiles:
+                self.__update_threats(tile)
+        if self.__shield_records is not None:
+            for tile in changed_tiles:
+                self.__update_shields(tile)
+        if self.__attacker_lists is not None:
+            for tile in changed_tiles:
+                self.__update_attackers(tile)
+        changed_tiles.clear()
+
+    def threat_map(self, player_index):
+        """Gets the damage the units of the other player can deal on every tile. 
+        Built once, then kept up to date: when a location gains, loses or upgrades an attacker, 
+        only the range of that attacker is added to or taken away from the map.
+
+        Args:
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A ThreatMap. It is updated in place the next time threat_map is called after the units on the map change, so it should not be modified.
+
+        """
+        self.__flush_changes()
+        threat = self.__threat_maps[player_index]
+        if threat is None:
+            if self.__threat_records is None:
+                self.__threat_records = [()] * TILE_COUNT
+                for tile in self.__occupied:
+                    self.__threat_records[tile] = self.__tile_threats(tile)
+                self.__track_changes = True
+            threat = ThreatMap(player_index)
+            for tile in self.__occupied:
+                self.__stamp_threats(threat, tile, self.__threat_records[tile], 1)
+            self.__threat_maps[player_index] = threat
+        return threat
+
+    def __tile_threats(self, tile):
+        """The attackers on a tile id, grouped by player and attack range
+        """
+        groups = {}
+        for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]:
+            if unit.damage_i + unit.damage_f > 0:
+                key = (unit.player_index, unit.attackRange)
+                damage_i, damage_f, count = groups.get(key, (0, 0, 0))
+                groups[key] = (damage_i + unit.damage_i, damage_f + unit.damage_f, count + 1)
+        return tuple((player_index, attack_range, damage_i, damage_f, count) for (player_index, attack_range), (damage_i, damage_f, count) in groups.items())
+
+    def __stamp_threats(self, threat, tile, records, sign):
+        """Adds (sign 1) or takes away (sign -1) the attackers of a tile id that threaten the defending player of a ThreatMap
+        """
+        for player_index, attack_range, damage_i, damage_f, count in records:
+            if player_index != threat.player_index:
+                threat.stamp(self.__attack_stencil(attack_range).tiles_in_range(tile), damage_i * sign, damage_f * sign, count * sign)
+
+    def __update_threats(self, tile):
+        """Moves the threat maps from the old attackers of a tile id to the current ones
+        """
+        records = self.__tile_threats(tile)
+        old_records = self.__threat_records[tile]
+        if records == old_records:
+            return
+        if self.__threats_shared:
+            self.__threat_maps = [threat.copy() if threat is not None else None for threat in self.__threat_maps]
+            self.__threat_records = self.__threat_records[:]
+            self.__threats_shared = False
+        self.__threat_records[tile] = records
+        for threat in self.__threat_maps:
+            if threat is not None:
+                self.__stamp_threats(threat, tile, old_records, -1)
+                self.__stamp_threats(threat, tile, records, 1)
+
+    def shield_map(self, player_index):
+        """Gets the shield the supports of a player give on every tile. 
+        Built once, then kept up to date like threat_map: when a location gains, loses or upgrades a support, 
+        only the range of that support is added to or taken away from the map.
+
+        Args:
+            player_index: The index corresponding to the player whose mobile units are shielded, 0 for you 1 for the enemy
+
+        Returns:
+            A ShieldMap. It is updated in place the next time shield_map is called after the units on the map change, so it should not be modified.
+
+        """
+        self.__flush_changes()
+        shield = self.__shield_maps[player_index]
+        if shield is None:
+            if self.__shield_records is None:
+                self.__shield_records = [()] * TILE_COUNT
+                for tile in self.__occupied:
+                    self.__shield_records[tile] = self.__tile_shields(tile)
+                self.__track_changes = True
+            shield = ShieldMap(player_index)
+            for tile in self.__occupied:
+                self.__stamp_shields(shield, tile, self.__shield_records[tile], 1)
+            self.__shield_maps[player_index] = shield
+        return shield
+
+    def __tile_shields(self, tile):
+        """The supports on a tile id, grouped by player and shield range
+        """
+        groups = {}
+        for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]:
+            if unit.shieldRange > 0:
+                #The bonus counts the rows in front of the edge of the support's player
+                rows = unit.y if unit.player_index == 0 else self.ARENA_SIZE - 1 - unit.y
+                shield = unit.shieldPerUnit + unit.shieldBonusPerY * rows
+                if shield > 0:
+                    key = (unit.player_index, unit.shieldRange)
+                    groups[key] = groups.get(key, 0) + shield
+        return tuple((player_index, shield_range, shield) for (player_index, shield_range), shield in groups.items())
+
+    def __stamp_shields(self, shield_map, tile, records, sign):
+        """Adds (sign 1) or takes away (sign -1) the supports of a tile id that shield the player of a ShieldMap
+        """
+        for player_index, shield_range, shield in records:
+            if player_index == shield_map.player_index:
+                shield_map.stamp(tile, self.__range_stencil(shield_range).tiles_in_range(tile), shield * sign)
+
+    def __update_shields(self, tile):
+        """Moves the shield maps from the old supports of a tile id to the current ones
+        """
+        records = self.__tile_shields(tile)
+        old_records = self.__shield_records[tile]
+        if records == old_records:
+            return
+        if self.__shields_shared:
+            self.__shield_maps = [shield_map.copy() if shield_map is not None else None for shield_map in self.__shield_maps]
+            self.__shield_records = self.__shield_records[:]
+            self.__shields_shared = False
+        self.__shield_records[tile] = records
+        for shield_map in self.__shield_maps:
+            if shield_map is not None:
+                self.__stamp_shields(shield_map, tile, old_records, -1)
+                self.__stamp_shields(shield_map, tile, records, 1)
+
+    def __attack_stencil(self, attack_range):
+        """Gets the cached stencil of the locations at most attack_range away
+        """
+        key = (attack_range, None)
+        stencil = _range_stencils.get(key)
+        if stencil is None:
+            stencil = _RangeStencil(*key)
+            _range_stencils[key] = stencil
+        return stencil
+
+    def attackers(self, location, player_index):
+        """Gets the units that can attack a unit of a player at a location. 
+        Looked up in an index from every tile to the enemy units in range of it, which is built once 
+        and then kept up to date like threat_map.
+
+        Args:
+            location: The location of a hypothetical defender, in the arena
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A tuple of GameUnits, ordered by x, then y, then their order on their location. It should not be modified.
+
+        """
+        self.__flush_changes()
+        if self.__attacker_lists is None:
+            self.__attacker_lists = [[()] * TILE_COUNT, [()] * TILE_COUNT]
+            self.__attacker_sources = [()] * TILE_COUNT
+            #Adding the sources by x, then y keeps every list in order
+            for tile in sorted(self.__occupied, key=lambda tile: (TILE_X[tile], TILE_Y[tile])):
+                sources = self.__tile_attackers(tile)
+                self.__attacker_sources[tile] = sources
+                for unit, unit_player_index, attack_range in sources:
+                    attacker_list = self.__attacker_lists[1 - unit_player_index]
+                    for target in self.__attack_stencil(attack_range).tiles_in_range(tile):
+                        attacker_list[target] += (unit,)
+            self.__track_changes = True
+        return self.__attacker_lists[player_index][tile_id(location)]
+
+    def __tile_attackers(self, tile):
+        """The units on a tile id that can attack, with the player and attack range they were indexed with
+        """
+        return tuple((unit, unit.player_index, unit.attackRange) for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]
+                     if unit.damage_i + unit.damage_f > 0)
+
+    def __update_attackers(self, tile):
+        """Moves the attacker lists from the old attackers on a tile id to the current ones
+        """
+        sources = self.__tile_attackers(tile)
+        old_sources = self.__attacker_sources[tile]
+        if len(sources) == len(old_sources) and all(new[0] is old[0] and new[1:] == old[1:] for new, old in zip(sources, old_sources)):
+            return
+        if self.__attackers_shared:
+            #The lists hold tuples, so copying the outer lists is enough
+            self.__attacker_lists = [attacker_list[:] for attacker_list in self.__attacker_lists]
+            self.__attacker_sources = self.__attacker_sources[:]
+            self.__attackers_shared = False
+        self.__attacker_sources[tile] = sources
+
+        targets = [set(), set()]
+        for _, unit_player_index, attack_range in old_sources + sources:
+            targets[1 - unit_player_index].update(self.__attack_stencil(attack_range).tiles_in_range(tile))
+        position = (TILE_X[tile], TILE_Y[tile])
+        for defender in (0, 1):
+            attacker_list = self.__attacker_lists[defender]
+            for target in targets[defender]:
+                attackers = [unit for unit in attacker_list[target] if (unit.x, unit.y) != position]
+                #Insert the new attackers in front of the first attacker further along x, then y
+                index = 0
+                while index < len(attackers) and (attackers[index].x, attackers[index].y) < position:
+                    index += 1
+                target_x = TILE_X[target]
+                target_y = TILE_Y[target]
+                attackers[index:index] = [unit for unit, unit_player_index, attack_range in sources if unit_player_index != defender
+                                          and math.sqrt((target_x - position[0]) ** 2 + (target_y - position[1]) ** 2) <= attack_range]
+                attacker_list[target] = tuple(attackers)
+
+    def __all_units(self):
+        for tile in self.__occupied:
+            for unit in self.__map[TILE_X[tile]][TILE_Y[tile]]:
+                yield unit
+
+    def _tile_changed(self, tile):
+        """Marks a tile id whose units changed, so the board arrays, the unit index and the threat maps are updated before their next use
+        """
+        if self.__track_changes:
+            self.__changed_tiles.add(tile)
+
+    def unit_changed(self, unit):
+        """Updates the board arrays and the unit index after the health or removal state of a unit was changed.
+        Upgrades through GameUnit.upgrade are picked up without it.
+        Units of a forked map can be shared with the map it was forked from, get them with edit_units before changing them.
+
+        Args:
+            unit: A GameUnit on this map
+
+        """
+        tile = tile_id([unit.x, unit.y])
+        if tile != -1:
+            self._tile_changed(tile)
+
+    def add_layout_listener(self, listener):
+        """Registers a function that is called whenever a location gains or loses its structure
+
+        Args:
+            listener: Called as listener(game_map, tile, blocked), where tile is the id of the changed tile
+                and blocked is True if the tile gained a structure
+        """
+        self._layout_listeners.append(listener)
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -184,9 +738,15 @@ class GameMap:
         """
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
+            return
         
         x, y = location
+        tile = tile_id(location)
         self.__map[x][y] = []
+        self.__occupied.discard(tile)
+        self.occupied_mask[tile] = 0
+        self._tile_changed(tile)
+        self._set_blocked(tile, False)
 
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
@@ -201,8 +761,10 @@ class GameMap:
         """
         if radius < 0 or radius > self.ARENA_SIZE:
             self.warn("Radius {} was passed to get_locations_in_range. Expected integer between 0 and {}".format(radius, self.ARENA_SIZE))
-        if not self.in_arena_bounds(location):
-            self._invalid_coordinates(location)
+        tile = tile_id(location)
+        if tile != -1:
+            return [[TILE_X[tile], TILE_Y[tile]] for tile in self.__range_stencil(radius).tiles_in_range(tile)]
+        self._invalid_coordinates(location)
 
         x, y = location
         locations = []
@@ -216,6 +778,56 @@ class GameMap:
                     locations.append(new_location)
         return locations
 
+    def get_tile_ids_in_range(self, location, radius):
+        """Gets the tile ids of the locations in a circular area around a location. 
+        The same area as get_locations_in_range, without creating a list for every location.
+
+        Args:
+            location: The center of our search area
+            radius: The radius of our search area
+
+        Returns:
+            A tuple of tile ids, see tiles.py
+
+        """
+        tile = tile_id(location)
+        if tile == -1:
+            return tuple(tile_id(location) for location in self.get_locations_in_range(location, radius))
+        return self.__range_stencil(radius).tiles_in_range(tile)
+
+    def __range_stencil(self, radius):
+        """Gets the cached stencil of a radius, creating it the first time the radius is used with this config's getHitRadius
+        """
+        key = (radius, self.config["unitInformation"][0]['getHitRadius'])
+        stencil = _range_stencils.get(key)
+        if stencil is None:
+            stencil = _RangeStencil(*key)
+            _range_stencils[key] = stencil
+        return stencil
+
+    def get_target_tiers(self, location, radius, player_index):
+        """Gets the tile ids in range of a location, in the order a unit of a player prefers its targets. 
+        The same area as get_tile_ids_in_range, split into tiers of equal distance from the location, nearest first.
+        Within a tier, tiles are sorted by the remaining tie-breaks of GameState.get_target that only depend on the tile:
+        lowest y for player 0 or highest y for player 1, then furthest from the center of the board along x.
+        The tiers of every location are cached, so they should not be modified.
+
+        Args:
+            location: The location of the attacking unit, in the arena
+            radius: The attackRange of the attacking unit
+            player_index: The index corresponding to the attacking player, 0 for you 1 for the enemy
+
+        Returns:
+            A tuple of tiers, each a tuple of tile ids, see tiles.py
+
+        """
+        key = (radius, self.config["unitInformation"][0]['getHitRadius'], player_index)
+        stencil = _target_stencils.get(key)
+        if stencil is None:
+            stencil = _TargetStencil(self.__range_stencil(radius), player_index)
+            _target_stencils[key] = stencil
+        return stencil.tiers_in_range(tile_id(location))
+
     def distance_between_locations(self, location_1, location_2):
         """Euclidean distance
 
@@ -1,11 +1,31 @@
 import math
 import json
 import sys
+from collections import namedtuple
 
 from .navigation import ShortestPathFinder
 from .util import send_command, debug_write
 from .unit import GameUnit
 from .game_map import GameMap
+from .tiles import TILE_COUNT, TILE_X, TILE_Y, HALF, EDGE_BITS, tile_id
+
+PathImpact = namedtuple("PathImpact", ["changed", "path", "path_length", "self_destructs"])
+PathImpact.__doc__ = """The effect of placing a structure on the path of a unit, see GameState.path_impact
+
+Attributes :
+    * changed (bool): True if the unit would take a different path
+    * path (list): The path the unit would take, None if the structure is placed on the unit
+    * path_length (int): The number of moves along the path, None if the structure is placed on the unit
+    * self_destructs (bool): True if the unit would not reach its target edge
+"""
+
+# The tile ids where we can spawn structures (our half of the arena) and mobile units (our two edges, GameMap.BOTTOM_LEFT and GameMap.BOTTOM_RIGHT).
+# Keyed by whether the unit is stationary. A spawn is legal on one of these tiles when the matching GameMap mask is 0 there,
+# occupied_mask for structures and structure_mask for mobile units.
+_SPAWN_TILES = {
+    True: tuple(tile for tile in range(TILE_COUNT) if HALF[tile] == 0),
+    False: tuple(tile for tile in range(TILE_COUNT) if HALF[tile] == 0 and EDGE_BITS[tile] & (1 << 2 | 1 << 3))}
+_SPAWN_AREAS = dict((stationary, bytes(1 if tile in tiles else 0 for tile in range(TILE_COUNT))) for stationary, tiles in _SPAWN_TILES.items())
 
 def is_stationary(unit_type):
     """
@@ -44,20 +64,23 @@ class GameState:
         * my_time (int): The time you took to submit your previous turn
         * enemy_health (int): Your opponents current remaining health
         * enemy_time (int): Your opponents current remaining time
+        * path_cache (:obj: PathCache): The cache used by find_path_to_edge and find_paths_to_edge, or None
 
     """
 
-    def __init__(self, config, serialized_string):
+    def __init__(self, config, serialized_string, path_cache=None):
         """ Setup a turns variables using arguments passed
 
         Args:
             * config (JSON): A json object containing information about the game
             * serialized_string (string): A string containing information about the game state at the start of this turn
+            * path_cache (:obj: PathCache): An optional cache of paths, kept across turns. Pass AlgoCore.path_cache to reuse paths found on earlier turns
 
         """
         self.serialized_string = serialized_string
         self.config = config
         self.enable_warnings = True
+        self.path_cache = path_cache
 
         global WALL, SUPPORT, TURRET, SCOUT, DEMOLISHER, INTERCEPTOR, REMOVE, UPGRADE, STRUCTURE_TYPES, ALL_UNITS, UNIT_TYPE_TO_INDEX
         UNIT_TYPE_TO_INDEX = {}
@@ -89,6 +112,10 @@ class GameState:
         MP = self.MP
         SP = self.SP
 
+        #[SP, MP] costs of every unit type and of upgrading every structure, looked up on every spawn
+        self._unit_costs = dict((unit_type, tuple(self.type_cost(unit_type))) for unit_type in ALL_UNITS)
+        self._upgrade_costs = dict((unit_type, tuple(self.type_cost(unit_type, True))) for unit_type in STRUCTURE_TYPES)
+
         self.game_map = GameMap(self.config)
         self._shortest_path_finder = ShortestPathFinder()
         self._build_stack = []
@@ -142,12 +169,13 @@ class GameState:
                     # Quick fix will deploy engine fix soon
                     if self.contains_stationary_unit([x,y]):
                         self.game_map[x,y][0].pending_removal = True
+                        self.game_map.unit_changed(self.game_map[x,y][0])
                 elif unit_type == UPGRADE:
                     if self.contains_stationary_unit([x,y]):
                         self.game_map[x,y][0].upgrade()
                 else:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
-                    self.game_map[x,y].append(unit)
+                    self.game_map._place_unit(unit)
 
     def __resource_required(self, unit_type):
         return self.SP if is_stationary(unit_type) else self.MP
@@ -180,6 +208,25 @@ class GameState:
         send_command(build_string)
         send_command(deploy_string)
 
+    def fork(self):
+        """Creates a copy of the game state for trying out hypothetical moves, such as placing structures and checking the new paths.
+        Much faster than copy.deepcopy: the two states share their units until one of them changes a location, see GameMap.fork, 
+        and the fork starts with the pathing results cached for this state.
+
+        Returns:
+            A new GameState with its own map, resources and build and deploy stacks. Spawns, removals and upgrades on either state 
+            do not affect the other. The path_cache is shared, since it is keyed by structure layout.
+
+        """
+        fork = GameState.__new__(GameState)
+        fork.__dict__.update(self.__dict__)
+        fork.game_map = self.game_map.fork()
+        fork._shortest_path_finder = self._shortest_path_finder.fork(self.game_map, fork.game_map)
+        fork._build_stack = list(self._build_stack)
+        fork._deploy_stack = list(self._deploy_stack)
+        fork._player_resources = [dict(resources) for resources in self._player_resources]
+        return fork
+
     def get_resource(self, resource_type, player_index = 0):
         """Gets a players resources
 
@@ -234,12 +281,13 @@ class GameState:
             The number of units affordable of the given unit_type.
 
         """
-        if unit_type not in ALL_UNITS:
+        costs = self._unit_costs.get(unit_type)
+        if costs is None:
             self._invalid_unit(unit_type)
             return
 
-        costs = self.type_cost(unit_type)
-        player_held = self.get_resources()
+        resources = self._player_resources[0]
+        player_held = [resources['SP'], resources['MP']]
         if costs[MP] > 0 and costs[SP] > 0:
             return min(math.floor(player_held[SP] / costs[SP]), math.floor(player_held[MP] / costs[MP]))
         elif costs[MP] > 0:
@@ -320,21 +368,24 @@ class GameState:
             True if we can spawn the unit(s)
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self._unit_costs:
             self._invalid_unit(unit_type)
             return
         
-        if not self.game_map.in_arena_bounds(location):
+        tile = tile_id(location)
+        if tile == -1:
             if self.enable_warnings:
                 self.warn("Could not spawn {} at location {}. Location invalid.".format(unit_type, location))
             return False
 
         affordable = self.number_affordable(unit_type) >= num
-        stationary = is_stationary(unit_type)
-        blocked = self.contains_stationary_unit(location) or (stationary and len(self.game_map[location[0],location[1]]) > 0)
-        correct_territory = location[1] < self.HALF_ARENA
-        on_edge = location in (self.game_map.get_edge_locations(self.game_map.BOTTOM_LEFT) + self.game_map.get_edge_locations(self.game_map.BOTTOM_RIGHT))
+        stationary = unit_type in STRUCTURE_TYPES
+        blocked = (self.game_map.occupied_mask if stationary else self.game_map.structure_mask)[tile] != 0
+        if affordable and not blocked and _SPAWN_AREAS[stationary][tile] and (not stationary or num == 1):
+            return True
 
+        correct_territory = HALF[tile] == 0
+        on_edge = EDGE_BITS[tile] & (1 << self.game_map.BOTTOM_LEFT | 1 << self.game_map.BOTTOM_RIGHT) != 0
         if self.enable_warnings:
             fail_reason = ""
             if not affordable:
@@ -352,6 +403,24 @@ class GameState:
                 (stationary or on_edge) and
                 (not stationary or num == 1))
 
+    def legal_spawn_locations(self, unit_type):
+        """Gets every location where a unit could be spawned, ignoring resources. 
+        The locations in our territory that are not blocked, and for mobile units, on one of our edges.
+
+        Args:
+            unit_type: The type of the unit
+
+        Returns:
+            A list of locations, in the order the map is iterated in
+
+        """
+        if unit_type not in self._unit_costs:
+            self._invalid_unit(unit_type)
+            return
+        stationary = unit_type in STRUCTURE_TYPES
+        blocked = self.game_map.occupied_mask if stationary else self.game_map.structure_mask
+        return [[TILE_X[tile], TILE_Y[tile]] for tile in _SPAWN_TILES[stationary] if not blocked[tile]]
+
     def attempt_spawn(self, unit_type, locations, num=1):
         """Attempts to spawn new units with the type given in the given locations.
 
@@ -364,7 +433,7 @@ class GameState:
             The number of units successfully spawned
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self._unit_costs:
             self._invalid_unit(unit_type)
             return
         if num < 1 or not locations:
@@ -373,22 +442,26 @@ class GameState:
       
         if type(locations[0]) == int:
             locations = [locations]
+        stationary = is_stationary(unit_type)
+        costs = self._unit_costs[unit_type]
         spawned_units = 0
         for location in locations:
-            for i in range(num):
-                if self.can_spawn(unit_type, location, 1):
-                    x, y = map(int, location)
-                    costs = self.type_cost(unit_type)
-                    self.__set_resource(SP, 0 - costs[SP])
-                    self.__set_resource(MP, 0 - costs[MP])
-                    self.game_map.add_unit(unit_type, location, 0)
-                    if is_stationary(unit_type):
-                        self._build_stack.append((unit_type, x, y))
-                    else:
-                        self._deploy_stack.append((unit_type, x, y))
-                    spawned_units += 1
-                else:
-                    break
+            if not self.can_spawn(unit_type, location, 1):
+                continue
+            #Spawning mobile units does not block their location, so as many as we can afford are spawned at once
+            count = 1 if stationary else min(num, self.number_affordable(unit_type))
+            x, y = map(int, location)
+            self.__set_resource(SP, 0 - costs[SP] * count)
+            self.__set_resource(MP, 0 - costs[MP] * count)
+            self.game_map.add_unit(unit_type, location, 0, count)
+            if stationary:
+                self._build_stack.append((unit_type, x, y))
+            else:
+                self._deploy_stack.extend([(unit_type, x, y)] * count)
+            spawned_units += count
+            if count < num:
+                #Warns about the units that could not be spawned
+                self.can_spawn(unit_type, location, 1)
         return spawned_units
 
     def attempt_remove(self, locations):
@@ -435,16 +508,19 @@ class GameState:
             if location[1] < self.HALF_ARENA and self.contains_stationary_unit(location):
                 x, y = map(int, location)
                 existing_unit = None
-                for unit in self.game_map[x,y]:
+                for index, unit in enumerate(self.game_map[x,y]):
                     if unit.stationary:
                         existing_unit = unit
+                        existing_index = index
 
                 if not existing_unit.upgraded and self.config["unitInformation"][UNIT_TYPE_TO_INDEX[existing_unit.unit_type]].get("upgrade", None) is not None:
-                    costs = self.type_cost(existing_unit.unit_type, True)
+                    costs = self._upgrade_costs[existing_unit.unit_type]
                     resources = self.get_resources()
                     if resources[SP] >= costs[SP] and resources[MP] >= costs[MP]:
                         self.__set_resource(SP, 0 - costs[SP])
                         self.__set_resource(MP, 0 - costs[MP])
+                        #The unit can be shared with a fork of this game state
+                        existing_unit = self.game_map.edit_units([x, y])[existing_index]
                         existing_unit.upgrade()
                         self._build_stack.append((UPGRADE, x, y))
                         spawned_units += 1
@@ -484,8 +560,87 @@ class GameState:
             target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from start_location if None.
 
         Returns:
-            A list of locations corresponding to the path the unit would take 
-            to get from it's starting location to the best available end location
+            A Path, the list of locations the unit would take 
+            to get from it's starting location to the best available end location.
+            Path.reaches_edge is False if the unit would self destruct
+
+        """
+        if self.contains_stationary_unit(start_location):
+            self.warn("Attempted to perform pathing from blocked starting location {}".format(start_location))
+            return
+
+        if target_edge is None:
+            target_edge = self.get_target_edge(start_location)
+
+        if self.path_cache is not None:
+            key = self.__path_cache_key(start_location, target_edge)
+            path = self.path_cache.get(key)
+            if path is not None:
+                return path
+
+        end_points = self.game_map.get_edge_locations(target_edge)
+        path = self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+        if self.path_cache is not None:
+            self.path_cache.put(key, path)
+        return path
+
+    def __path_cache_key(self, start_location, target_edge):
+        return (self.game_map.layout_hash, tile_id(start_location), target_edge)
+
+    def pocket_id(self, location):
+        """Gets the pocket of pathable space a location is in. 
+        Units can move between two locations only if they are in the same pocket.
+
+        Args:
+            location: The location to check
+
+        Returns:
+            The label of the pocket, which stays the same until a structure is placed or removed next to the pocket.
+            None for locations outside the arena or holding a structure
+
+        """
+        tile = tile_id(location)
+        if tile == -1 or self.game_map.structure_mask[tile]:
+            return
+        return self._shortest_path_finder.get_pocket(tile, self).label
+
+    def can_reach_edge(self, location, target_edge=None):
+        """Checks if a unit at a location can reach an edge, or would self destruct.
+        Pockets of pathable space are labeled once, so this is fast to call for many locations.
+
+        Args:
+            location: The location of a hypothetical unit
+            target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from location if None.
+
+        Returns:
+            True if the unit would reach the edge, False if it would self destruct or the location holds a structure
+
+        """
+        tile = tile_id(location)
+        if tile == -1:
+            self.warn("Checked if a unit can reach an edge from {}, which is outside of arena bounds".format(location))
+            return False
+        if self.game_map.structure_mask[tile]:
+            return False
+        if target_edge is None:
+            target_edge = self.get_target_edge(location)
+        end_points = self.game_map.get_edge_locations(target_edge)
+        return self._shortest_path_finder.can_reach(tile, end_points, self)
+
+    def path_impact(self, start_location, candidate_locations, target_edge=None):
+        """Finds how placing a structure on each of several locations would change the path of a unit.
+        Much faster than placing each structure and calling find_path_to_edge, since the distance field 
+        of the edge is shared and only repaired around each candidate.
+
+        Args:
+            start_location: The location of a hypothetical unit
+            candidate_locations: A list of locations a structure could be placed on
+            target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from start_location if None.
+
+        Returns:
+            A list with a PathImpact for each candidate location, in the same order as candidate_locations.
+            The entry is None for locations outside the arena or already holding a structure.
+            None if start_location is blocked.
 
         """
         if self.contains_stationary_unit(start_location):
@@ -495,8 +650,103 @@ class GameState:
         if target_edge is None:
             target_edge = self.get_target_edge(start_location)
 
+        #Candidates that can not hold a new structure are expected in lists of options, and are skipped quietly
+        candidates = []
+        for location in candidate_locations:
+            if not self.game_map.in_arena_bounds(location) or self.contains_stationary_unit(location):
+                candidates.append(None)
+            else:
+                candidates.append(location)
+
         end_points = self.game_map.get_edge_locations(target_edge)
-        return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+        path, new_paths = self._shortest_path_finder.navigate_with_placements(start_location, end_points, [location for location in candidates if location is not None], self)
+        new_paths = iter(new_paths)
+        impacts = []
+        for location in candidates:
+            if location is None:
+                impacts.append(None)
+                continue
+            new_path = next(new_paths)
+            if new_path is None:
+                impacts.append(PathImpact(True, None, None, False))
+            else:
+                impacts.append(PathImpact(new_path != path, new_path, len(new_path) - 1, not new_path.reaches_edge))
+        return impacts
+
+    def edge_distance_field(self, edge):
+        """Gets the number of steps a unit at any location needs to reach an edge
+
+        Args:
+            edge: The edge units want to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc.
+
+        Returns:
+            A DistanceField, field[x, y] is the length of the shortest route from [x, y] to the edge. 
+            It is 0 on the edge and -1 for locations that hold a structure or can not reach the edge.
+            The field is cached until the structure layout of game_map changes, so it should not be modified.
+
+        """
+        if not edge in [self.game_map.TOP_RIGHT, self.game_map.TOP_LEFT, self.game_map.BOTTOM_LEFT, self.game_map.BOTTOM_RIGHT]:
+            self.warn("Passed invalid edge '{}' to edge_distance_field.".format(edge))
+            return
+        end_points = self.game_map.get_edge_locations(edge)
+        return self._shortest_path_finder.edge_distance_field(end_points, self)
+
+    def edge_distance_tensor(self):
+        """Gets the number of steps a unit at any location needs to reach each of the four edges. Requires numpy.
+
+        Returns:
+            A numpy array of shape (4, ARENA_SIZE, ARENA_SIZE), tensor[edge, x, y] is the value edge_distance_field(edge) has at [x, y].
+            The array is cached until the structure layout of game_map changes, so it should not be modified.
+            None if numpy is not available.
+
+        """
+        return self._shortest_path_finder.distance_tensor(self)
+
+    def set_pathing_backend(self, backend, verify=False):
+        """Chooses how the distance fields used for pathing are computed
+
+        Args:
+            backend: "python" (the default) or "numpy", which computes the fields of all four edges at once. Falls back to "python" if numpy is not available.
+            verify: If True, fields from the numpy backend are checked against the python backend, and mismatches are printed as debug output
+
+        """
+        self._shortest_path_finder.set_backend(backend, verify)
+
+    def find_paths_to_edge(self, start_locations, target_edge=None):
+        """Gets the paths units at several locations would take.
+        Returns the same paths as calling find_path_to_edge for each location, but the 
+        pathfinding work is shared between all locations that target the same edge.
+
+        Args:
+            start_locations: A list of locations of hypothetical units
+            target_edge: The edge the units want to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from each start location if None.
+
+        Returns:
+            A list with the path for each location, in the same order as start_locations.
+            The entry is None for locations that are blocked by a structure
+
+        """
+        paths = [None] * len(start_locations)
+        starts_by_edge = {}
+        for index, start_location in enumerate(start_locations):
+            if self.contains_stationary_unit(start_location):
+                self.warn("Attempted to perform pathing from blocked starting location {}".format(start_location))
+                continue
+            edge = target_edge if target_edge is not None else self.get_target_edge(start_location)
+            if self.path_cache is not None:
+                paths[index] = self.path_cache.get(self.__path_cache_key(start_location, edge))
+                if paths[index] is not None:
+                    continue
+            starts_by_edge.setdefault(edge, []).append(index)
+
+        for edge, indices in starts_by_edge.items():
+            end_points = self.game_map.get_edge_locations(edge)
+            edge_paths = self._shortest_path_finder.navigate_multiple_starts([start_locations[index] for index in indices], end_points, self)
+            for index, path in zip(indices, edge_paths):
+                paths[index] = path
+                if self.path_cache is not None:
+                    self.path_cache.put(self.__path_cache_key(start_locations[index], edge), path)
+        return paths
 
     def contains_stationary_unit(self, location):
         """Check if a location is blocked, return structures unit if it is
@@ -508,11 +758,13 @@ class GameState:
             A structures unit if there is a stationary unit at the location, False otherwise
             
         """
-        if not self.game_map.in_arena_bounds(location):
+        tile = tile_id(location)
+        if tile == -1:
             self.warn('Checked for stationary unit outside of arena bounds')
             return False
-        x, y = map(int, location)
-        for unit in self.game_map[x,y]:
+        if not self.game_map.structure_mask[tile]:
+            return False
+        for unit in self.game_map[TILE_X[tile], TILE_Y[tile]]:
             if unit.stationary:
                 return unit
         return False
@@ -555,6 +807,9 @@ class GameState:
             return
 
         attacker_location = [attacking_unit.x, attacking_unit.y]
+        if self.game_map.in_arena_bounds(attacker_location):
+            return self.__find_target(attacking_unit, attacker_location)
+
         possible_locations = self.game_map.get_locations_in_range(attacker_location, attacking_unit.attackRange)
         target = None
         target_stationary = True
@@ -614,6 +869,76 @@ class GameState:
                     target_x_distance = unit_x_distance
         return target
 
+    def __find_target(self, attacking_unit, attacker_location):
+        """Walks the tiles in range of an attacker in the arena in priority order, see GameMap.get_target_tiers.
+        The first tier with a mobile target decides. Structures lose to mobile units at any distance, 
+        so the first tier with a structure target is kept until the tiers run out.
+        """
+        game_map = self.game_map
+        occupied = game_map.occupied_mask
+        player_index = attacking_unit.player_index
+        hits_structures = attacking_unit.damage_f != 0
+        hits_mobile = attacking_unit.damage_i != 0
+        if not hits_structures and not hits_mobile:
+            return None
+        structure_target = None
+        for tier in game_map.get_target_tiers(attacker_location, attacking_unit.attackRange, player_index):
+            mobile_target = None
+            find_structures = structure_target is None
+            for tile in tier:
+                if not occupied[tile]:
+                    continue
+                for unit in game_map.tile_units(tile):
+                    if unit.player_index == player_index or not (hits_structures if unit.unit_type in STRUCTURE_TYPES else hits_mobile):
+                        continue
+                    #Tiles are already sorted by the tie-breaks after health, so the first unit with the lowest health wins
+                    if not unit.stationary:
+                        if mobile_target is None or unit.health < mobile_target.health:
+                            mobile_target = unit
+                    elif find_structures and (structure_target is None or unit.health < structure_target.health):
+                        structure_target = unit
+            if mobile_target is not None:
+                return mobile_target
+            if structure_target is not None and not hits_mobile:
+                return structure_target
+        return structure_target
+
+    def threat_map(self, player_index):
+        """Gets the damage enemy units can deal on every tile, built once from the range of every attacker. 
+        Use it instead of get_attackers to score many locations, for example every location of several paths, 
+        or to score a hypothetical turret: adding it to the map only adds its own range to the threat map.
+
+        Args:
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A ThreatMap, with the summed damage_i and damage_f of the units get_attackers would return for every tile id, 
+            and their number. It is kept up to date as units are added, removed or upgraded, so it should not be modified.
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return
+        return self.game_map.threat_map(player_index)
+
+    def shield_map(self, player_index):
+        """Gets the shield the supports of a player give on every tile, built once from the range of every support. 
+        Together with threat_map it scores paths by effective health: the shield collected along a path 
+        adds to the health of the mobile units walking it.
+
+        Args:
+            player_index: The index corresponding to the player whose mobile units are shielded, 0 for you 1 for the enemy
+
+        Returns:
+            A ShieldMap, with the summed shield of the supports in range of every tile id, including the bonus for their y position and upgrades.
+            It is kept up to date as units are added, removed or upgraded, so it should not be modified.
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return
+        return self.game_map.shield_map(player_index)
+
     def get_attackers(self, location, player_index):
         """Gets the stationary units threatening a given location
 
@@ -622,7 +947,8 @@ class GameState:
             player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
 
         Returns:
-            A list of units that would attack a unit controlled by the given player at the given location
+            A list of units that would attack a unit controlled by the given player at the given location.
+            Locations in the arena are looked up in an index kept by the game map, see GameMap.attackers
 
         """
 
@@ -631,6 +957,9 @@ class GameState:
         if not self.game_map.in_arena_bounds(location):
             self.warn("Location {} is not in the arena bounds.".format(location))
 
+        if self.game_map.in_arena_bounds(location):
+            return list(self.game_map.attackers(location, player_index))
+
         attackers = []
         """
         Get locations in the range of TURRET units
@@ -639,9 +968,38 @@ class GameState:
         for unit in self.config["unitInformation"]:
             if unit.get('attackRange', 0) >= max_range:
                 max_range = unit.get('attackRange', 0)
-        possible_locations= self.game_map.get_locations_in_range(location, max_range)
-        for location_unit in possible_locations:
+        possible_tiles = self.game_map.get_tile_ids_in_range(location, max_range)
+        for tile in possible_tiles:
+            location_unit = [TILE_X[tile], TILE_Y[tile]]
             for unit in self.game_map[location_unit]:
                 if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index and self.game_map.distance_between_locations(location, location_unit) <= unit.attackRange:
                     attackers.append(unit)
         return attackers
+
+    def get_attackers_along(self, path, player_index):
+        """Gets the stationary units threatening any location of a path, each one once
+
+        Args:
+            path: A Path, or a list of locations a hypothetical defender moves along
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A list of (unit, tiles) pairs, where tiles is the number of locations of the path the unit can attack.
+            Units are in the order they first threaten the path.
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+
+        tiles = {}
+        attackers = []
+        for location in path:
+            if not self.game_map.in_arena_bounds(location):
+                self.warn("Location {} is not in the arena bounds.".format(location))
+                continue
+            for unit in self.game_map.attackers(location, player_index):
+                if id(unit) not in tiles:
+                    tiles[id(unit)] = 0
+                    attackers.append(unit)
+                tiles[id(unit)] += 1
+        return [(unit, tiles[id(unit)]) for unit in attackers]
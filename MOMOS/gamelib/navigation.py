@@ -1,24 +1,166 @@
 import heapq
 import math
 import sys
-import queue
+from collections import deque, OrderedDict
 from .util import debug_write
+from .tiles import TILE_COUNT, TILE_X, TILE_Y, GRID_IDS, NEIGHBORS, EDGE_IDS, tile_id
+from .wavefront import WavefrontEngine
 
-class Node:
-    """A path-finding node
+class DistanceField:
+    """The number of steps a unit needs to reach an edge, for every location
+
+    field[x, y] is 0 on the edge itself, and -1 for locations that hold a structure,
+    are outside of the arena or are cut off from the edge.
+
+    Attributes :
+        * pathlength (list): The steps from every tile to the edge, indexed by tile id, see tiles.py
+        * end_ids (tuple): The tile ids of the edge
+
+    """
+    def __init__(self, pathlength, end_ids):
+        self.pathlength = pathlength
+        self.end_ids = end_ids
+
+    def __getitem__(self, location):
+        tile = tile_id(location)
+        if tile == -1:
+            return -1
+        return self.pathlength[tile]
+
+class Path:
+    """The path a unit takes, as returned by GameState.find_path_to_edge
+
+    The locations are stored as a tuple of tile ids, see tiles.py. A path can still be
+    used like the list of [x, y] locations older code expects: it can be iterated, indexed and
+    compared with a list. Checking if a location is on the path takes constant time.
+    PathCache hands the same Path to every caller, so it cannot be changed once created.
+
+    Attributes :
+        * ids (tuple): The tile id of every location on the path, in order. Read only
+        * reaches_edge (bool): True if the unit reaches its target edge, False if it self destructs
+
+    """
+    def __init__(self, ids, reaches_edge):
+        self._ids = tuple(ids)
+        self.reaches_edge = reaches_edge
+        self._id_set = None
+
+    @property
+    def ids(self):
+        return self._ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [[TILE_X[tile], TILE_Y[tile]] for tile in self.ids[index]]
+        tile = self.ids[index]
+        return [TILE_X[tile], TILE_Y[tile]]
+
+    def __iter__(self):
+        for tile in self.ids:
+            yield [TILE_X[tile], TILE_Y[tile]]
+
+    def __contains__(self, location):
+        try:
+            tile = tile_id(location)
+        except (TypeError, ValueError):
+            return False
+        if self._id_set is None:
+            self._id_set = frozenset(self.ids)
+        return tile in self._id_set
+
+    def __eq__(self, other):
+        if isinstance(other, Path):
+            return self.ids == other.ids
+        try:
+            return len(self.ids) == len(other) and all(list(location) == [x, y] for location, (x, y) in zip(other, self))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self._ids)
+
+    def __repr__(self):
+        return repr(list(self))
+
+class Pocket:
+    """A connected area of pathable space. Units can move between any two tiles of a pocket, but never leave it.
+
+    Attributes :
+        * label (int): The label of the pocket, unique until the structure layout of the map changes
+        * tiles (list): The tile ids of the pocket
+        * ideals (dict): The most ideal tile of the pocket for each set of endpoints, keyed by the tuple of endpoint tile ids
+
+    """
+    def __init__(self, label, tiles):
+        self.label = label
+        self.tiles = tiles
+        self.ideals = {}
+
+class PathCache:
+    """A bounded least recently used cache of paths, which can be kept across turns
+
+    Paths are keyed by (layout hash, start location, target edge), see GameMap.layout_hash.
+    Any change to the structures on the map changes the layout hash, so stale paths are never returned,
+    while identical layouts on later turns reuse the paths found before.
 
     Attributes :
-        * visited_idealness (bool): Have we visited this node during the idealness search step?
-        * visited_validate (bool): Have we visited this node during the validation step?
-        * blocked (bool): Is there a structures at this node's location
-        * pathlength: The distance between this node and the target location
+        * maxsize (int): The maximum number of paths kept
+        * hits (int): The number of lookups that found a path
+        * misses (int): The number of lookups that did not
 
     """
-    def __init__(self):
-        self.visited_idealness = False
-        self.visited_validate = False
-        self.blocked = False
-        self.pathlength = -1
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._paths = OrderedDict()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def get(self, key):
+        """Gets a cached Path, or None if there is no path cached for key
+        """
+        path = self._paths.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._paths.move_to_end(key)
+        return path
+
+    def put(self, key, path):
+        """Caches a Path, evicting the least recently used one if the cache is full
+        """
+        self._paths[key] = path
+        self._paths.move_to_end(key)
+        if len(self._paths) > self.maxsize:
+            self._paths.popitem(last=False)
+
+    def clear(self):
+        """Removes all paths and resets the statistics
+        """
+        self._paths.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the cache statistics as a dictionary with the keys hits, misses, size and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._paths),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
 
 """
 This class helps with pathfinding. We guarantee the results will
@@ -28,18 +170,114 @@ code to maximise time efficiency
 class ShortestPathFinder:
     """Handles path-finding
 
+    The search state lives in flat arrays indexed by tile id, see tiles.py.
+    They are allocated once and reset in bulk at the start of every query, so
+    repeated path queries do not allocate a new grid each time. Walls are read
+    from GameMap.structure_mask, which uses the same indexing, and neighbors from tiles.NEIGHBORS.
+
+    Whenever a unit can reach its target edge, its path only depends on the distance
+    from every tile to that edge. Those distance fields are cached per edge until the
+    structure layout of the map changes, see edge_distance_field. While cached,
+    they are repaired in place whenever a single location gains or loses its structure.
+    In the same way, the pockets of pathable space are labeled once and their most ideal
+    tile is remembered, so the idealness search is skipped for every start in a known pocket.
+
+    Fields can be computed by a breadth first search in pure python (the default), or
+    by the numpy WavefrontEngine, which fills the fields of all four edges in one pass. See set_backend.
+
     Attributes :
         * HORIZONTAL (int): A constant representing a horizontal movement
         * VERTICAL (int): A constant representing a vertical movement
 
         * game_state (:obj: GameState): The current gamestate
-        * game_map (:obj: GameMap): The current gamemap
+        * blocked (bytearray): The structure mask of the GameMap being traversed, 1 for every tile with a structure on it
+        * visited_idealness (bytearray): 1 for every tile visited during the idealness search step
+        * pathlength (list): The distance between each tile and a self destruct target location, -1 if unknown
+        * pocket (list): The label of the pocket of pathable space each tile is in, -1 for structures and tiles that were not labeled yet.
+          Pockets are labeled when first needed and kept until a change to the structure layout touches them, see get_pocket
+        * backend (str): "python" or "numpy", the way edge distance fields are computed
+        * verify_backend (bool): If True, fields from the numpy backend are checked against the python backend
 
     """
-    def __init__(self):
+    ARENA_SIZE = 28
+    _neighbor_table = NEIGHBORS
+
+    def __init__(self, backend="python", verify=False):
         self.HORIZONTAL = 1
         self.VERTICAL = 2
         self.initialized = False
+        size = TILE_COUNT
+        self.blocked = None
+        self.visited_idealness = bytearray(size)
+        self.pathlength = [-1] * size
+        self.pocket = [-1] * size
+        self._clear_flags = bytes(size)
+        self._clear_pathlength = [-1] * size
+        self._queue = deque()
+        self._edge_fields = {}
+        self._edge_fields_layout = None
+        self._pockets = {}
+        self._pockets_layout = None
+        self._next_pocket_label = 0
+        self._watched_map = None
+        self._walked_pathlength = self.pathlength
+        self._edge_indices = dict((tiles, edge) for edge, tiles in enumerate(EDGE_IDS))
+        self._wavefront = None
+        self._tensor = None
+        self._tensor_layout = None
+        self.set_backend(backend, verify)
+
+    def set_backend(self, backend, verify=False):
+        """Chooses how edge distance fields are computed
+
+        Args:
+            * backend: "python" for a breadth first search per edge, or "numpy" to fill all four edges at once with the WavefrontEngine
+            * verify: If True, every field computed by the numpy backend is compared with the python backend. 
+              Mismatches are printed to the debug output and the python field is used.
+
+        """
+        if backend not in ["python", "numpy"]:
+            debug_write("Invalid pathing backend '{}'. Please use 'python' or 'numpy'".format(backend))
+            return
+        if backend == "numpy" and not WavefrontEngine.available():
+            debug_write("The numpy pathing backend needs numpy, using the python backend instead")
+            backend = "python"
+        self.backend = backend
+        self.verify_backend = verify
+        self._edge_fields = {}
+
+    def fork(self, game_map, forked_map):
+        """Creates a path finder for a fork of a map, see GameMap.fork. 
+        The distance fields, pockets and distance tensor cached for game_map are copied, so the fork starts with them.
+
+        Args:
+            * game_map: The map that was forked
+            * forked_map: The fork of game_map
+
+        Returns:
+            A new ShortestPathFinder
+
+        """
+        finder = ShortestPathFinder(self.backend, self.verify_backend)
+        finder._wavefront = self._wavefront
+        layout = (game_map, game_map.layout_version)
+        forked_layout = (forked_map, forked_map.layout_version)
+        if self._edge_fields_layout == layout:
+            #Fields are repaired in place, so each finder needs its own
+            finder._edge_fields = dict((key, DistanceField(field.pathlength[:], key)) for key, field in self._edge_fields.items())
+            finder._edge_fields_layout = forked_layout
+        if self._pockets_layout == layout:
+            #Pockets are forgotten rather than changed, so they can be shared
+            finder.pocket[:] = self.pocket
+            finder._pockets = dict(self._pockets)
+            finder._pockets_layout = forked_layout
+            finder._next_pocket_label = self._next_pocket_label
+        if self._tensor_layout == layout:
+            finder._tensor = self._tensor
+            finder._tensor_layout = forked_layout
+        if finder._edge_fields_layout is not None or finder._pockets_layout is not None:
+            finder._watch(forked_map)
+        return finder
 
     def initialize_map(self, game_state):
         """Initializes the map
@@ -47,10 +285,280 @@ class ShortestPathFinder:
         Args:
             game_state: A GameState object representing the gamestate we want to traverse
         """
-        #Initialize map 
+        #Reset the search arrays in place
         self.initialized = True
         self.game_state = game_state
-        self.game_map = [[Node() for x in range(self.game_state.ARENA_SIZE)] for y in range(self.game_state.ARENA_SIZE)]
+        self.blocked = game_state.game_map.structure_mask
+        self.visited_idealness[:] = self._clear_flags
+        self.pathlength[:] = self._clear_pathlength
+
+    def edge_distance_field(self, end_points, game_state):
+        """Gets the distance from every tile to the closest of a set of endpoints
+
+        Args:
+            * end_points: The end points, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            A DistanceField. Fields are cached until the structure layout of the map changes, so they should not be modified.
+
+        """
+        self.game_state = game_state
+        self.blocked = game_state.game_map.structure_mask
+        return self._edge_field([tile_id(location) for location in end_points])
+
+    def _edge_field(self, end_ids):
+        """Gets the cached distance field of a set of endpoints, computing it if the structure layout changed
+        """
+        game_map = self.game_state.game_map
+        layout = (game_map, game_map.layout_version)
+        if self._edge_fields_layout != layout:
+            self._watch(game_map)
+            self._edge_fields = {}
+            self._edge_fields_layout = layout
+        key = tuple(end_ids)
+        field = self._edge_fields.get(key)
+        if field is None:
+            if self.backend == "numpy" and key in self._edge_indices:
+                self._fill_from_wavefront()
+                return self._edge_fields[key]
+            field = DistanceField(self._python_field(end_ids), key)
+            self._edge_fields[key] = field
+        return field
+
+    def _python_field(self, end_ids):
+        """Computes the pathlength of every tile to a set of endpoints with a breadth first search
+        """
+        pathlength = [-1] * TILE_COUNT
+        self._validate(end_ids[0], end_ids, pathlength)
+        return pathlength
+
+    def _fill_from_wavefront(self):
+        """Caches the fields of all four edges from the numpy distance tensor
+        """
+        tensor = self.distance_tensor(self.game_state)
+        for key, edge in self._edge_indices.items():
+            if key in self._edge_fields:
+                continue
+            pathlength = self._wavefront.tile_field(tensor, edge)
+            if self.verify_backend:
+                expected = self._python_field(key)
+                if pathlength != expected:
+                    mismatches = [tile for tile in range(len(expected)) if pathlength[tile] != expected[tile]]
+                    debug_write("numpy pathing backend disagrees with the python backend for edge {} at tile ids {}".format(edge, mismatches))
+                    pathlength = expected
+            self._edge_fields[key] = DistanceField(pathlength, key)
+
+    def distance_tensor(self, game_state):
+        """Gets the distance from every tile to each of the four edges, computed in one pass by the WavefrontEngine
+
+        Args:
+            * game_state: The current game state
+
+        Returns:
+            A numpy array of shape (4, ARENA_SIZE, ARENA_SIZE), see WavefrontEngine.distance_tensor. 
+            It is cached until the structure layout of the map changes, so it should not be modified.
+            None if numpy is not available.
+
+        """
+        if not WavefrontEngine.available():
+            debug_write("distance_tensor needs numpy")
+            return
+        game_map = game_state.game_map
+        layout = (game_map, game_map.layout_version)
+        if self._tensor_layout != layout:
+            if self._wavefront is None:
+                self._wavefront = WavefrontEngine()
+            self._tensor = self._wavefront.distance_tensor(game_map.structure_mask)
+            self._tensor_layout = layout
+        return self._tensor
+
+    def _watch(self, game_map):
+        """Registers for changes to the structure layout of game_map, once per map
+        """
+        if self._watched_map is not game_map:
+            game_map.add_layout_listener(self._on_layout_change)
+            self._watched_map = game_map
+
+    def _on_layout_change(self, game_map, tile, blocked):
+        """Called by GameMap whenever a tile gains or loses its structure. 
+        Repairs the cached distance fields and pockets, as long as they were up to date before the change.
+        """
+        previous_layout = (game_map, game_map.layout_version - 1)
+        layout = (game_map, game_map.layout_version)
+        if self._edge_fields_layout == previous_layout:
+            for field in self._edge_fields.values():
+                if blocked:
+                    self._repair_blocked(field.pathlength, tile, game_map.structure_mask)
+                else:
+                    self._repair_unblocked(field.pathlength, field.end_ids, tile, game_map.structure_mask)
+            self._edge_fields_layout = layout
+        if self._pockets_layout == previous_layout:
+            #A new structure can split its pocket, and a removed one can join the pockets around it
+            pocket = self.pocket
+            touched = [tile] if blocked else self._neighbor_table[tile]
+            for location in touched:
+                if pocket[location] != -1:
+                    self._forget_pocket(pocket[location])
+            self._pockets_layout = layout
+
+    def get_pocket(self, start, game_state):
+        """Gets the pocket of pathable space a tile is in, labeling it if needed
+
+        Args:
+            * start: The tile id of a tile without a structure
+            * game_state: The current game state
+
+        Returns:
+            The Pocket holding start
+
+        """
+        game_map = game_state.game_map
+        layout = (game_map, game_map.layout_version)
+        if self._pockets_layout != layout:
+            self._watch(game_map)
+            self.pocket[:] = self._clear_pathlength
+            self._pockets = {}
+            self._pockets_layout = layout
+        label = self.pocket[start]
+        if label != -1:
+            return self._pockets[label]
+
+        #Flood fill the pocket
+        neighbor_table = self._neighbor_table
+        blocked = game_map.structure_mask
+        pocket = self.pocket
+        label = self._next_pocket_label
+        self._next_pocket_label += 1
+        pocket[start] = label
+        tiles = [start]
+        for location in tiles:
+            for neighbor in neighbor_table[location]:
+                if pocket[neighbor] == -1 and not blocked[neighbor]:
+                    pocket[neighbor] = label
+                    tiles.append(neighbor)
+        self._pockets[label] = Pocket(label, tiles)
+        return self._pockets[label]
+
+    def can_reach(self, start, end_points, game_state):
+        """Checks if a unit can reach a set of endpoints
+
+        Args:
+            * start: The tile id of a tile without a structure
+            * end_points: The end points of the unit, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            True if any of the end points is in the same pocket as start
+
+        """
+        end_ids = [tile_id(location) for location in end_points]
+        return self._pocket_ideal(self.get_pocket(start, game_state), end_ids) in end_ids
+
+    def _forget_pocket(self, label):
+        """Removes the label of a pocket, it will be labeled again when needed
+        """
+        pocket = self.pocket
+        for location in self._pockets.pop(label).tiles:
+            pocket[location] = -1
+
+    def _pocket_ideal(self, pocket, end_ids):
+        """Finds the most ideal tile of a pocket. An unblocked endpoint if the pocket holds one,
+        or the best self destruct location otherwise. Remembered until the pocket changes.
+        """
+        key = tuple(end_ids)
+        ideal = pocket.ideals.get(key)
+        if ideal is not None:
+            return ideal
+        labels = self.pocket
+        for tile in end_ids:
+            if labels[tile] == pocket.label:
+                ideal = tile
+                break
+        else:
+            #Idealness is different for every tile, so the best tile does not depend on the search order
+            direction = self._get_direction_from_endpoints(end_ids)
+            ideal = max(pocket.tiles, key=lambda tile: self._get_idealness(tile, direction))
+        pocket.ideals[key] = ideal
+        return ideal
+
+    def _repair_blocked(self, pathlength, tile, blocked):
+        """Updates a distance field after a structure is placed on tile. 
+        Only the tiles whose every shortest route went through tile are searched again.
+        """
+        neighbor_table = self._neighbor_table
+        old_pathlength = pathlength[tile]
+        pathlength[tile] = -1
+        if old_pathlength == -1:
+            return
+
+        #Find the tiles that lost all of their neighbors one step closer to the edge.
+        #The queue holds tiles in order of pathlength, so a tile is only checked once
+        #every closer tile that could support it has been checked.
+        current = deque(neighbor for neighbor in neighbor_table[tile] if pathlength[neighbor] == old_pathlength + 1)
+        checked = set()
+        invalid = set()
+        while current:
+            location = current.popleft()
+            if location in checked:
+                continue
+            checked.add(location)
+            supported_by = pathlength[location] - 1
+            for neighbor in neighbor_table[location]:
+                if pathlength[neighbor] == supported_by and not blocked[neighbor] and neighbor not in invalid:
+                    break
+            else:
+                invalid.add(location)
+                for neighbor in neighbor_table[location]:
+                    if pathlength[neighbor] == supported_by + 2:
+                        current.append(neighbor)
+
+        #Search the invalid tiles again, starting from the valid tiles around them
+        for location in invalid:
+            pathlength[location] = -1
+        frontier = []
+        for location in invalid:
+            best = -1
+            for neighbor in neighbor_table[location]:
+                if pathlength[neighbor] != -1 and not blocked[neighbor] and (best == -1 or pathlength[neighbor] < best):
+                    best = pathlength[neighbor]
+            if best != -1:
+                heapq.heappush(frontier, (best + 1, location))
+        while frontier:
+            distance, location = heapq.heappop(frontier)
+            if pathlength[location] != -1:
+                continue
+            pathlength[location] = distance
+            for neighbor in neighbor_table[location]:
+                if neighbor in invalid and pathlength[neighbor] == -1:
+                    heapq.heappush(frontier, (distance + 1, neighbor))
+
+    def _repair_unblocked(self, pathlength, end_ids, tile, blocked):
+        """Updates a distance field after the structure on tile is removed. 
+        Only the tiles that found a shorter route through tile are searched again.
+        """
+        neighbor_table = self._neighbor_table
+        if tile in end_ids:
+            pathlength[tile] = 0
+        else:
+            best = -1
+            for neighbor in neighbor_table[tile]:
+                if pathlength[neighbor] != -1 and not blocked[neighbor] and (best == -1 or pathlength[neighbor] < best):
+                    best = pathlength[neighbor]
+            if best == -1:
+                return
+            pathlength[tile] = best + 1
+
+        current = deque([tile])
+        while current:
+            location = current.popleft()
+            next_pathlength = pathlength[location] + 1
+            for neighbor in neighbor_table[location]:
+                if blocked[neighbor]:
+                    continue
+                if pathlength[neighbor] == -1 or pathlength[neighbor] > next_pathlength:
+                    pathlength[neighbor] = next_pathlength
+                    current.append(neighbor)
 
     def navigate_multiple_endpoints(self, start_point, end_points, game_state):
         """Finds the path a unit would take to reach a set of endpoints
@@ -61,52 +569,191 @@ class ShortestPathFinder:
             * game_state: The current game state
 
         Returns:
-            The path a unit at start_point would take when trying to reach end_points given the current game state.
+            The Path a unit at start_point would take when trying to reach end_points given the current game state.
             Note that this path can change if a tower is destroyed during pathing, or if you or your enemy places structures.
+            None if start_point is outside the arena or blocked by a structure.
 
         """
+        start = tile_id(start_point)
+        if start == -1:
+            debug_write("Attempted to perform pathing from {}, which is not in the arena".format(start_point))
+            return
         if game_state.contains_stationary_unit(start_point):
             return
 
-        #Initialize map 
+        #Initialize map, walls come straight from the map's structure mask
         self.initialize_map(game_state)
-        #Fill in walls
-        for location in self.game_state.game_map:
-            if self.game_state.contains_stationary_unit(location):
-                self.game_map[location[0]][location[1]].blocked = True
         #Do pathfinding
-        ideal_endpoints = self._idealness_search(start_point, end_points)
-        self._validate(ideal_endpoints, end_points)
-        return self._get_path(start_point, end_points)
+        end_ids = [tile_id(location) for location in end_points]
+        ideal_endpoint = self._pocket_ideal(self.get_pocket(start, game_state), end_ids)
+        if ideal_endpoint in end_ids:
+            pathlength = self._edge_field(end_ids).pathlength
+        else:
+            pathlength = self.pathlength
+            self._validate(ideal_endpoint, end_ids, pathlength)
+        return self._get_path(start, end_ids, pathlength)
+
+    def navigate_multiple_starts(self, start_points, end_points, game_state):
+        """Finds the paths units at several start points would take to reach the same set of endpoints
+
+        Start points are grouped by the pocket of pathable space they are in. The validation step 
+        runs once for all pockets that can reach the edge plus once for every pocket whose units would self destruct.
+
+        Args:
+            * start_points: The starting locations of the units
+            * end_points: The end points of the units, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            A list with the path each unit would take, in the order of start_points. 
+            The entry is None for start points that are outside the arena or blocked by a structure.
 
-    def _idealness_search(self, start, end_points):
+        """
+        self.initialize_map(game_state)
+        blocked = self.blocked
+        end_ids = [tile_id(location) for location in end_points]
+        end_set = set(end_ids)
+
+        #Group the start points by the most ideal tile of their pocket
+        paths = [None] * len(start_points)
+        edge_starts = []
+        starts_by_ideal = {}
+        for index, start_point in enumerate(start_points):
+            start = tile_id(start_point)
+            if start == -1:
+                debug_write("Attempted to perform pathing from {}, which is not in the arena".format(start_point))
+                continue
+            if blocked[start]:
+                continue
+            ideal = self._pocket_ideal(self.get_pocket(start, game_state), end_ids)
+            if ideal in end_set:
+                edge_starts.append((index, start))
+            else:
+                starts_by_ideal.setdefault(ideal, []).append((index, start))
+
+        #Every pocket that reaches the edge shares the same distance field
+        if edge_starts:
+            pathlength = self._edge_field(end_ids).pathlength
+            for index, start in edge_starts:
+                paths[index] = self._get_path(start, end_ids, pathlength)
+
+        pathlength = self.pathlength
+        for ideal, starts in starts_by_ideal.items():
+            pathlength[:] = self._clear_pathlength
+            self._validate(ideal, end_ids, pathlength)
+            for index, start in starts:
+                paths[index] = self._get_path(start, end_ids, pathlength)
+        return paths
+
+    def navigate_with_placements(self, start_point, end_points, candidates, game_state):
+        """Finds the path a unit would take, and the path it would take if a structure was placed on each candidate location
+
+        The path is found once. When the unit reaches its edge, each candidate is checked by repairing a copy
+        of the cached edge distance field, and a full search is only done for candidates that cut the unit off from the edge.
+        When the unit self destructs, only candidates in the pocket of pathable space of the unit are searched again.
+
+        Args:
+            * start_point: The starting location of the unit, should not hold a structure
+            * end_points: The end points of the unit, should be a list of edge locations
+            * candidates: The locations a structure could be placed on, should be in the arena and not hold a structure
+            * game_state: The current game state
+
+        Returns:
+            The path of the unit, and a list with the path the unit would take after placing a structure on each candidate.
+            The path is None for a candidate on start_point.
+
+        """
+        self.initialize_map(game_state)
+        start = tile_id(start_point)
+        end_ids = [tile_id(location) for location in end_points]
+        pocket = self.pocket
+        label = self.get_pocket(start, game_state).label
+        ideal_endpoint = self._pocket_ideal(self._pockets[label], end_ids)
+        reaches_edge = ideal_endpoint in end_ids
+        if reaches_edge:
+            pathlength = self._edge_field(end_ids).pathlength
+        else:
+            pathlength = self.pathlength
+            self._validate(ideal_endpoint, end_ids, pathlength)
+        path = self._get_path(start, end_ids, pathlength)
+        if not reaches_edge:
+            pathlength = None
+
+        #Candidates are placed on a private copy of the structure mask
+        blocked = bytearray(self.blocked)
+        self.blocked = blocked
+        paths = []
+        try:
+            for candidate in candidates:
+                tile = tile_id(candidate)
+                if tile == start:
+                    paths.append(None)
+                    continue
+                if pocket[tile] != label:
+                    #Tiles the unit can not reach have no effect on its path
+                    paths.append(path)
+                    continue
+                blocked[tile] = 1
+                if reaches_edge:
+                    new_pathlength = list(pathlength)
+                    self._repair_blocked(new_pathlength, tile, blocked)
+                if not reaches_edge or new_pathlength[start] == -1:
+                    #The unit was or will be cut off from the edge, so the self destruct target has to be searched for again
+                    self.visited_idealness[:] = self._clear_flags
+                    new_pathlength = self.pathlength
+                    new_pathlength[:] = self._clear_pathlength
+                    self._validate(self._idealness_search(start, end_ids), end_ids, new_pathlength)
+                paths.append(self._get_path(start, end_ids, new_pathlength))
+                blocked[tile] = 0
+        finally:
+            self.blocked = game_state.game_map.structure_mask
+        return path, paths
+
+    def _idealness_search(self, start, end_ids):
         """
         Finds the most ideal tile in our 'pocket' of pathable space. 
         The edge if it is available, or the best self destruct location otherwise
+
+        Unlike get_pocket, this searches self.blocked directly, so it also works while 
+        navigate_with_placements tries structures on a copy of the map's structure mask.
         """
-        current = queue.Queue()
-        current.put(start)
-        best_idealness = self._get_idealness(start, end_points)
-        self.game_map[start[0]][start[1]].visited_idealness = True
+        neighbor_table = self._neighbor_table
+        blocked = self.blocked
+        visited = self.visited_idealness
+        end_set = set(end_ids)
+        if start in end_set:
+            return start
+
+        direction = self._get_direction_from_endpoints(end_ids)
+        x_sign = 1 if direction[0] == 1 else -1
+        y_sign = 1 if direction[1] == 1 else -1
+
+        current = self._queue
+        current.clear()
+        current.append(start)
+        visited[start] = 1
         most_ideal = start
+        best_idealness = self._get_idealness(start, direction)
 
-        while not current.empty():
-            search_location = current.get()
-            for neighbor in self._get_neighbors(search_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+        while current:
+            search_location = current.popleft()
+            for neighbor in neighbor_table[search_location]:
+                if blocked[neighbor] or visited[neighbor]:
                     continue
-
-                x, y = neighbor
-                current_idealness = self._get_idealness(neighbor, end_points)
-
+                visited[neighbor] = 1
+                current.append(neighbor)
+
+                if neighbor in end_set:
+                    current.clear()
+                    return neighbor
+                #Unrolled _get_idealness, a tile's idealness only depends on its coordinates
+                x = TILE_X[neighbor]
+                y = TILE_Y[neighbor]
+                current_idealness = 28 * (y if y_sign == 1 else 27 - y) + (x if x_sign == 1 else 27 - x)
                 if current_idealness > best_idealness:
                     best_idealness = current_idealness
                     most_ideal = neighbor
 
-                if not self.game_map[x][y].visited_idealness and not self.game_map[x][y].blocked:
-                    self.game_map[x][y].visited_idealness = True
-                    current.put(neighbor)
-
         return most_ideal
 
     def _get_neighbors(self, location):
@@ -115,176 +762,170 @@ class ShortestPathFinder:
         x, y = location
         return [[x, y + 1], [x, y - 1], [x + 1, y], [x - 1, y]]
 
-    def _get_direction_from_endpoints(self, end_points):
+    def _get_direction_from_endpoints(self, end_ids):
         """Prints a message to the games debug output
 
         Args:
-            * end_points: A set of endpoints, should be an edge 
+            * end_ids: The tile ids of a set of endpoints, should be an edge 
 
         Returns:
             A direction [x,y] representing the edge. For example, [1,1] for the top right and [-1, 1] for the top left
 
         """
-        point = end_points[0]
-        x, y = point
+        x = TILE_X[end_ids[0]]
+        y = TILE_Y[end_ids[0]]
         direction = [1, 1]
-        if x < self.game_state.HALF_ARENA:
+        if x < self.ARENA_SIZE // 2:
            direction[0] = -1
-        if y < self.game_state.HALF_ARENA:
+        if y < self.ARENA_SIZE // 2:
             direction[1] = -1
         return direction
 
-    def _get_idealness(self, location, end_points):
+    def _get_idealness(self, tile, direction):
         """Get the idealness of a tile, the reachable tile the unit most wants to path to.
-        Better self destruct locations are more ideal. The endpoints are perfectly ideal. 
+        Better self destruct locations are more ideal. The endpoints are perfectly ideal,
+        and are handled by _idealness_search directly.
 
         Returns:
-            A location the unit will attempt to reach
+            The idealness of the tile, higher is better
         """
-        if location in end_points:
-            return sys.maxsize
-
-        direction = self._get_direction_from_endpoints(end_points)
-
+        x = TILE_X[tile]
+        y = TILE_Y[tile]
         idealness = 0
         if direction[1] == 1:
-            idealness += 28 * location[1]
+            idealness += 28 * y
         else: 
-            idealness += 28 * (27 - location[1])
+            idealness += 28 * (27 - y)
         if direction[0] == 1:
-            idealness += location[0]
+            idealness += x
         else: 
-            idealness += (27 - location[0])
+            idealness += (27 - x)
 
         return idealness
 
-    def _validate(self, ideal_tile, end_points):
-        """Breadth first search of the grid, setting the pathlengths of each node
+    def _validate(self, ideal_tile, end_ids, pathlength):
+        """Breadth first search of the grid, setting the pathlength of each tile.
+        pathlength must be cleared to -1, tiles that are not -1 count as visited.
 
         """
+        neighbor_table = self._neighbor_table
+        blocked = self.blocked
+
         #VALIDATION
         #Add our most ideal tiles to current
-        current = queue.Queue()
-        if ideal_tile in end_points:
-            for location in end_points:
-               current.put(location)
-               #Set current pathlength to 0
-               self.game_map[location[0]][location[1]].pathlength = 0
-               self.game_map[location[0]][location[1]].visited_validate = True
+        current = self._queue
+        current.clear()
+        if ideal_tile in end_ids:
+            for tile in end_ids:
+                #Blocked endpoints can not be reached, so they keep a pathlength of -1
+                if not blocked[tile]:
+                    #Set current pathlength to 0
+                    pathlength[tile] = 0
+                    current.append(tile)
         else:
-            current.put(ideal_tile)
-            self.game_map[ideal_tile[0]][ideal_tile[1]].pathlength = 0
-            self.game_map[ideal_tile[0]][ideal_tile[1]].visited_validate = True
+            current.append(ideal_tile)
+            pathlength[ideal_tile] = 0
 
         #While current is not empty
-        while not current.empty():
-            current_location = current.get()
-            current_node = self.game_map[current_location[0]][current_location[1]]
-            for neighbor in self._get_neighbors(current_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+        while current:
+            current_tile = current.popleft()
+            next_pathlength = pathlength[current_tile] + 1
+            for neighbor in neighbor_table[current_tile]:
+                if blocked[neighbor] or not pathlength[neighbor] == -1:
                     continue
-
-                neighbor_node = self.game_map[neighbor[0]][neighbor[1]]
-                if not neighbor_node.visited_validate and not current_node.blocked:
-                    neighbor_node.pathlength = current_node.pathlength + 1
-                    neighbor_node.visited_validate = True
-                    current.put(neighbor)
+                pathlength[neighbor] = next_pathlength
+                current.append(neighbor)
 
         #debug_write("Print after validate")
         #self.print_map()
         return
 
-    def _get_path(self, start_point, end_points):
+    def _get_path(self, start, end_ids, pathlength):
         """Once all nodes are validated, and a target is found, the unit can path to its target
 
         """
         #GET THE PATH
-        path = [start_point]
-        current = start_point
+        self._walked_pathlength = pathlength
+        direction = self._get_direction_from_endpoints(end_ids)
+        path = [start]
+        current = start
         move_direction = 0
 
-        while not self.game_map[current[0]][current[1]].pathlength == 0:
-            #debug_write("current tile {} has cost {}".format(current, self.game_map[current[0]][current[1]].pathlength))
-            next_move = self._choose_next_move(current, move_direction, end_points)
-            #debug_write(next_move)
+        while not pathlength[current] == 0:
+            next_move = self._choose_next_move(current, move_direction, direction, pathlength)
 
-            if current[0] == next_move[0]:
+            if TILE_X[current] == TILE_X[next_move]:
                 move_direction = self.VERTICAL
             else:
                 move_direction = self.HORIZONTAL
             path.append(next_move)
             current = next_move
-        
-        #debug_write(path)
-        return path
+
+        return Path(path, current in end_ids)
   
-    def _choose_next_move(self, current_point, previous_move_direction, end_points):
-        """Given the current location and adjacent locations, return the best 'next step' for a given unit to take
+    def _choose_next_move(self, current_point, previous_move_direction, direction, pathlength):
+        """Given the current tile and adjacent tiles, return the best 'next step' for a given unit to take
         """
-        neighbors = self._get_neighbors(current_point)
-        #debug_write("Unit at {} previously moved {} and has these neighbors {}".format(current_point, previous_move_direction, neighbors))
+        blocked = self.blocked
 
         ideal_neighbor = current_point
-        best_pathlength = self.game_map[current_point[0]][current_point[1]].pathlength
-        for neighbor in neighbors:
-            #debug_write("Comparing champ {} and contender {}".format(ideal_neighbor, neighbor))
-            if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+        best_pathlength = pathlength[current_point]
+        for neighbor in self._neighbor_table[current_point]:
+            if blocked[neighbor]:
                 continue
 
-            new_best = False
-            x, y = neighbor
-            current_pathlength = self.game_map[x][y].pathlength
+            current_pathlength = pathlength[neighbor]
 
             #Filter by pathlength
             if current_pathlength > best_pathlength:
                 continue
-            elif current_pathlength < best_pathlength:
-                #debug_write("Contender has better pathlength at {} vs champs {}".format(current_pathlength, best_pathlength))
-                new_best = True
-
-            #Filter by direction based on prev move
-            if not new_best and not self._better_direction(current_point, neighbor, ideal_neighbor, previous_move_direction, end_points):
-                continue
+            elif current_pathlength == best_pathlength:
+                #Filter by direction based on prev move
+                if not self._better_direction(current_point, neighbor, ideal_neighbor, previous_move_direction, direction):
+                    continue
 
             ideal_neighbor = neighbor
             best_pathlength = current_pathlength
 
-        #debug_write("Gave unit at {} new tile {}".format(current_point, ideal_neighbor))
         return ideal_neighbor
 
-    def _better_direction(self, prev_tile, new_tile, prev_best, previous_move_direction, end_points):
+    def _better_direction(self, prev_tile, new_tile, prev_best, previous_move_direction, direction):
         """Compare two tiles and return True if the unit would rather move to the new one
 
         """
+        prev_x = TILE_X[prev_tile]
+        prev_y = TILE_Y[prev_tile]
+        new_x = TILE_X[new_tile]
+        new_y = TILE_Y[new_tile]
+        best_x = TILE_X[prev_best]
+        best_y = TILE_Y[prev_best]
         #True if we are moving in a different direction than prev move and prev is not
         #If we previously moved horizontal, and now one of our options has a different x position then the other (the two options are not up/down)
-        if previous_move_direction == self.HORIZONTAL and not new_tile[0] == prev_best[0]:
+        if previous_move_direction == self.HORIZONTAL and not new_x == best_x:
             #We want to go up now. If we have not changed our y, we are not going up
-            if prev_tile[1] == new_tile[1]:
+            if prev_y == new_y:
                 return False 
             return True
-        if previous_move_direction == self.VERTICAL and not new_tile[1] == prev_best[1]:
-            if prev_tile[0] == new_tile[0]:
-                #debug_write("contender {} has the same x coord as prev tile {} so we will keep best move {}".format(new_tile, prev_tile, prev_best))
+        if previous_move_direction == self.VERTICAL and not new_y == best_y:
+            if prev_x == new_x:
                 return False
             return True
         if previous_move_direction == 0: 
-            if prev_tile[1] == new_tile[1]: 
+            if prev_y == new_y: 
                 return False
             return True
         
         #To make it here, both moves are on the same axis 
-        direction = self._get_direction_from_endpoints(end_points)
-        if new_tile[1] == prev_best[1]: #If they both moved horizontal...
-            if direction[0] == 1 and new_tile[0] > prev_best[0]: #If we moved right and right is our direction, we moved towards our direction
+        if new_y == best_y: #If they both moved horizontal...
+            if direction[0] == 1 and new_x > best_x: #If we moved right and right is our direction, we moved towards our direction
                 return True 
-            if direction[0] == -1 and new_tile[0] < prev_best[0]: #If we moved left and left is our direction, we moved towards our direction
+            if direction[0] == -1 and new_x < best_x: #If we moved left and left is our direction, we moved towards our direction
                 return True 
             return False 
-        if new_tile[0] == prev_best[0]: #If they both moved vertical...
-            if direction[1] == 1 and new_tile[1] > prev_best[1]: #If we moved up and up is our direction, we moved towards our direction
+        if new_x == best_x: #If they both moved vertical...
+            if direction[1] == 1 and new_y > best_y: #If we moved up and up is our direction, we moved towards our direction
                 return True
-            if direction[1] == -1 and new_tile[1] < prev_best[1]: #If we moved down and down is our direction, we moved towards our direction
+            if direction[1] == -1 and new_y < best_y: #If we moved down and down is our direction, we moved towards our direction
                 return True
             return False
         return True
@@ -299,9 +940,9 @@ class ShortestPathFinder:
 
         for y in range(28):
             for x in range(28):
-                node = self.game_map[x][28 - y - 1]
-                if not node.blocked and not node.pathlength == -1:
-                    self._print_justified(node.pathlength)
+                tile = GRID_IDS[x * self.ARENA_SIZE + (28 - y - 1)]
+                if tile != -1 and not self.blocked[tile] and not self._walked_pathlength[tile] == -1:
+                    self._print_justified(self._walked_pathlength[tile])
                 else:
                     sys.stderr.write("   ")
             debug_write("")
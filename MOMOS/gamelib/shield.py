@@ -0,0 +1,76 @@
+from .tiles import TILE_COUNT, path_ids
+
+
+class ShieldMap:
+    """The shield the supports of one player give on every tile of the arena, with one entry per tile id (see tiles.py)
+
+    A support shields every mobile unit of its player that comes within its shieldRange, once per unit.
+    The amount is its shieldPerUnit, plus shieldBonusPerY for every row the support stands in front of its player's edge.
+    The map is built by stamping the range of every support onto the arena once, and afterwards GameMap adds
+    and takes away the range of single supports as units change, see GameMap.shield_map and GameState.shield_map.
+
+    Attributes :
+        * player_index (int): The player whose mobile units are shielded, 0 for you 1 for the enemy
+        * shield (list): The summed shield of the supports in range of every tile
+        * supports (list): The tile ids of the supports in range of every tile, as tuples
+        * yields (list): The shield the supports on every tile id give to a mobile unit, 0 for tiles without a support
+
+    """
+    def __init__(self, player_index):
+        self.player_index = player_index
+        self.shield = [0] * TILE_COUNT
+        self.supports = [()] * TILE_COUNT
+        self.yields = [0] * TILE_COUNT
+
+    def stamp(self, support_tile, tiles, shield):
+        """Adds the supports on a tile id to the tiles in their range. A negative shield takes all of them away again
+
+        Args:
+            support_tile: The tile id of the supports
+            tiles: The tile ids within the shieldRange of the supports
+            shield: The summed shield the supports give to a mobile unit
+
+        """
+        map_shield = self.shield
+        supports = self.supports
+        if shield > 0:
+            for tile in tiles:
+                map_shield[tile] += shield
+                supports[tile] += (support_tile,)
+            self.yields[support_tile] += shield
+        else:
+            for tile in tiles:
+                supports[tile] = tuple(support for support in supports[tile] if support != support_tile)
+                #Reset emptied tiles, so rounding errors of the bonus do not pile up
+                map_shield[tile] = map_shield[tile] + shield if supports[tile] else 0
+            self.yields[support_tile] = 0
+
+    def path_shield(self, path):
+        """Sums the shield a mobile unit collects along a path, counting every support once
+
+        Args:
+            path: A Path, or a list of locations
+
+        Returns:
+            The shield a mobile unit would receive from every support in range of at least one location of the path
+
+        """
+        supports = self.supports
+        seen = set()
+        for tile in path_ids(path):
+            seen.update(supports[tile])
+        yields = self.yields
+        return sum(yields[support] for support in seen)
+
+    def copy(self):
+        """Copies the map
+
+        Returns:
+            A new ShieldMap with the same entries
+
+        """
+        shield = ShieldMap(self.player_index)
+        shield.shield = self.shield[:]
+        shield.supports = self.supports[:]
+        shield.yields = self.yields[:]
+        return shield
@@ -2,6 +2,12 @@ import unittest
 import json
 from .game_state import GameState
 from .unit import GameUnit
+from .navigation import ShortestPathFinder, PathCache, Path
+from .wavefront import WavefrontEngine
+from .board import BoardArrays
+from .simulation import Simulator
+from .batch import BatchSimulator
+from .tiles import TILE_COUNT, TILE_X, TILE_Y, NEIGHBORS, HALF, EDGE_BITS, tile_id, tile_location
 
 class BasicTests(unittest.TestCase):
 
@@ -215,6 +221,41 @@ class BasicTests(unittest.TestCase):
         self.assertEqual([("DF", 13, 6)], game._build_stack, "Build queue is wrong!")
         self.assertEqual([("SI", 13, 0), ("SI", 13, 0), ("SI", 13, 0)], game._deploy_stack, "Deploy queue is wrong!")
 
+    def test_bulk_spawning(self):
+        game = self.make_turn_0_map()
+        self.assertEqual(5, game.attempt_spawn("PI", [13, 0], 1000), "We should spawn as many units as we can afford")
+        self.assertEqual(0, game.get_resource(game.MP), "All MP should be spent")
+        self.assertEqual([("PI", 13, 0)] * 5, game._deploy_stack, "Deploy queue is wrong!")
+        self.assertEqual(5, len(game.game_map[13, 0]), "Every unit should be on the map")
+        self.assertEqual(0, game.attempt_spawn("PI", [14, 0], 1000), "We should not spawn units we can not afford")
+
+        units = game.game_map[13, 0]
+        self.assertEqual(5, len(set(map(id, units))), "Every spawned unit should be its own GameUnit")
+        units[0].health -= 10
+        self.assertEqual([5, 15, 15, 15, 15], [unit.health for unit in game.game_map[13, 0]], "Changing one unit of a stack should not change the others")
+        units[0].health += 10
+
+        fork = game.fork()
+        units = fork.game_map.edit_units([13, 0])
+        units[0].health = 1
+        self.assertEqual(5, len(set(map(id, units))), "Edited units should not be shared")
+        self.assertEqual([1, 15, 15, 15, 15], [unit.health for unit in fork.game_map[13, 0]], "Only the edited unit should change")
+        self.assertEqual([15] * 5, [unit.health for unit in game.game_map[13, 0]], "Editing a fork should not change the original units")
+
+    def test_legal_spawn_locations(self):
+        game = self.make_turn_0_map()
+        self.assertEqual(210, len(game.legal_spawn_locations("FF")), "Structures should be placeable on our whole half")
+        self.assertEqual(28, len(game.legal_spawn_locations("PI")), "Mobile units should be placeable on our two edges")
+        game.attempt_spawn("PI", [13, 0])
+        game.attempt_spawn("FF", [[14, 1], [12, 1]])
+        self.assertNotIn([13, 0], game.legal_spawn_locations("FF"), "Structures can not be placed on mobile units")
+        self.assertIn([13, 0], game.legal_spawn_locations("PI"), "Mobile units can stack")
+        self.assertNotIn([12, 1], game.legal_spawn_locations("SI"), "Mobile units can not be placed on structures")
+        game.game_map.remove_unit([12, 1])
+        self.assertIn([12, 1], game.legal_spawn_locations("SI"), "Removed structures should free their location")
+        for location in game.game_map:
+            self.assertEqual(location in game.legal_spawn_locations("DF"), game.can_spawn("DF", location), "can_spawn should agree with legal_spawn_locations")
+
     def test_trivial_functions(self):
         game = self.make_turn_0_map()
 
@@ -235,11 +276,116 @@ class BasicTests(unittest.TestCase):
             game.game_map.add_unit("FF", [13,13])
         self.assertEqual(1, len(game.game_map[13,13]), "Towers seem to be stacking")
         
+    def test_tiles(self):
+        game = self.make_turn_0_map()
+        locations = [location for location in game.game_map]
+        self.assertEqual(420, TILE_COUNT)
+        self.assertEqual(locations, [tile_location(tile) for tile in range(TILE_COUNT)], "Tile ids should follow the map's iteration order")
+        self.assertEqual(list(range(TILE_COUNT)), [tile_id(location) for location in locations])
+        self.assertEqual(-1, tile_id([0, 0]))
+        self.assertEqual(-1, tile_id([13, -1]))
+        self.assertEqual(-1, tile_id([30, 13]))
+        self.assertEqual(-1, tile_id([13.5, 3]))
+        self.assertEqual([[13, 1], [14, 0]], [tile_location(tile) for tile in NEIGHBORS[tile_id([13, 0])]], "Neighbors should be up, down, right, left")
+        for tile in range(TILE_COUNT):
+            for neighbor in NEIGHBORS[tile]:
+                self.assertIn(tile, NEIGHBORS[neighbor])
+                self.assertEqual(1, abs(TILE_X[tile] - TILE_X[neighbor]) + abs(TILE_Y[tile] - TILE_Y[neighbor]))
+            self.assertEqual(TILE_Y[tile] >= 14, HALF[tile] == 1)
+        for edge, edge_locations in enumerate(game.game_map.get_edges()):
+            self.assertEqual(14, len(edge_locations))
+            for location in edge_locations:
+                self.assertTrue(EDGE_BITS[tile_id(location)] & 1 << edge)
+        self.assertEqual(56, sum(bin(bits).count("1") for bits in EDGE_BITS), "Every edge should have 14 tiles")
+
+    def test_map_iteration(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        locations = list(game_map)
+        self.assertEqual(420, len(locations))
+        self.assertEqual([[13, 0], [14, 0], [12, 1]], locations[:3])
+        self.assertEqual([14, 27], locations[-1])
+        pairs = 0
+        for location in game_map:
+            for other in game_map:
+                pairs += 1
+        self.assertEqual(420 * 420, pairs, "Nested loops over the map should not interfere")
+
+        self.assertEqual([], game_map.occupied_tiles())
+        game_map.add_unit("FF", [13, 20], 1)
+        game_map.add_unit("DF", [13, 5], 0)
+        game_map.add_unit("PI", [14, 0], 0)
+        game_map[10, 10] = [GameUnit("EF", game.config, 1, None, 10, 10)]
+        self.assertEqual([[14, 0], [13, 5], [10, 10], [13, 20]], game_map.occupied_tiles(), "Occupied tiles should be in map order")
+        self.assertEqual(["DF", "EF", "FF"], [unit.unit_type for unit in game_map.structures()])
+        self.assertEqual(["EF", "FF"], [unit.unit_type for unit in game_map.structures(1)])
+        game_map.remove_unit([13, 20])
+        game_map[10, 10] = []
+        self.assertEqual([[14, 0], [13, 5]], game_map.occupied_tiles())
+        self.assertEqual([], game_map.structures(1))
+
+    def test_structure_mask(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        tile = tile_id([13, 5])
+        game_map.add_unit("SI", [13, 5])
+        self.assertFalse(game_map.structure_mask[tile], "Mobile units should not block a tile")
+        self.assertFalse(game.contains_stationary_unit([13, 5]), "Mobile units are not stationary")
+        game_map.add_unit("FF", [13, 5])
+        self.assertTrue(game_map.structure_mask[tile], "Structures should block a tile")
+        self.assertEqual("FF", game.contains_stationary_unit([13, 5]).unit_type, "The wall should be returned")
+        game_map.remove_unit([13, 5])
+        self.assertFalse(game_map.structure_mask[tile], "Removing units should unblock a tile")
+        game_map[13, 5] = [GameUnit("DF", game.config, 0, None, 13, 5)]
+        self.assertTrue(game.contains_stationary_unit([13, 5]), "Assigned structures should block a tile")
+        self.assertFalse(game.can_spawn("FF", [13, 5]), "We should not build on a structure")
+        game_map[13, 5] = []
+        self.assertTrue(game.can_spawn("FF", [13, 5]), "Assigning an empty list should free the tile")
+
     def test_get_units_in_range(self):
         game = self.make_turn_0_map()
         self.assertEqual(1, len(game.game_map.get_locations_in_range([13,13], 0)), "We should be in 0 range of ourself")
         self.assertEqual(37, len(game.game_map.get_locations_in_range([13,13], 3.5)), "Wrong number of tiles in range")
 
+    def test_range_stencils(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        for radius in [0, 1, 2.5, 3.5, 4.5]:
+            for center in [[13, 0], [0, 13], [13, 13], [20, 20], [27, 14]]:
+                expected = []
+                for x in range(28):
+                    for y in range(28):
+                        if game_map.in_arena_bounds([x, y]) and game_map.distance_between_locations(center, [x, y]) < radius + 0.01:
+                            expected.append([x, y])
+                self.assertEqual(expected, game_map.get_locations_in_range(center, radius), "Cached ranges should match a full search")
+                self.assertEqual([tile_id(location) for location in expected], list(game_map.get_tile_ids_in_range(center, radius)))
+        locations = game_map.get_locations_in_range([13, 13], 3.5)
+        locations.append([0, 0])
+        self.assertEqual(37, len(game_map.get_locations_in_range([13, 13], 3.5)), "Returned lists should not share the cache")
+
+    def test_get_target(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 12], 0)
+        turret = game.game_map[13, 12][0]
+        tiers = game.game_map.get_target_tiers([13, 12], turret.attackRange, 0)
+        self.assertEqual((tile_id([13, 12]),), tiers[0], "The location of the attacker should be the nearest tier")
+        self.assertEqual((tile_id([13, 11]), tile_id([12, 12]), tile_id([14, 12]), tile_id([13, 13])), tiers[1], "Lower y and further from the center should come first for player 0")
+
+        game.game_map.add_unit("PI", [14, 13], 1)
+        game.game_map.add_unit("PI", [12, 13], 1)
+        game.game_map.add_unit("PI", [13, 14], 1)
+        target = game.get_target(turret)
+        self.assertEqual([12, 13], [target.x, target.y], "Equal targets should be broken by distance from the center")
+        game.game_map[14, 13][0].health = 1
+        target = game.get_target(turret)
+        self.assertEqual([14, 13], [target.x, target.y], "Lower health should come before location")
+
+        game.game_map.add_unit("EI", [13, 15], 1)
+        demolisher = game.game_map[13, 15][0]
+        self.assertEqual([13, 12], [game.get_target(demolisher).x, game.get_target(demolisher).y], "Structures should be targeted without mobile units")
+        game.game_map.add_unit("PI", [11, 12], 0)
+        self.assertEqual([11, 12], [game.get_target(demolisher).x, game.get_target(demolisher).y], "Mobile units should come before nearer structures")
+
     def _test_get_attackers(self):
         game = self.make_turn_0_map()
         
@@ -256,6 +402,386 @@ class BasicTests(unittest.TestCase):
         game.game_map.add_unit("DF", [14,14], 1)
         self.assertEqual(3, len(game.get_attackers([13,13], 0)), "We should be in danger from 3 places")
 
+    def test_pathing(self):
+        game = self.make_turn_0_map()
+        diagonal = [[13, 0], [13, 1]] + [[x, y] for x in range(14, 27) for y in (x - 13, x - 12)] + [[27, 14]]
+        self.assertEqual(diagonal, game.find_path_to_edge([13, 0]), "Unit should zigzag to the top right edge")
+        for x in range(5, 22):
+            game.game_map.add_unit("FF", [x, 10])
+        self.assertEqual(diagonal, game.find_path_to_edge([13, 0]), "Walls off the path should not change it")
+        self.assertEqual(None, game.find_path_to_edge([13, 10]), "Pathing should not start on a wall")
+        top_right = game.game_map.TOP_RIGHT
+        self.assertEqual(None, game.find_path_to_edge([0, 0], top_right), "Pathing should not start outside the arena")
+        self.assertEqual([None, diagonal], game.find_paths_to_edge([[0, 0], [13, 0]], top_right), "Batch pathing should skip starts outside the arena")
+        for x in range(28):
+            if game.game_map.in_arena_bounds([x, 11]):
+                game.game_map.add_unit("FF", [x, 11])
+        self_destruct = diagonal[:20] + [[23, 10], [24, 10]]
+        self.assertEqual(self_destruct, game.find_path_to_edge([13, 0]), "Unit should self destruct at the most ideal tile")
+        for _ in range(3):
+            self.assertEqual(self_destruct, game.find_path_to_edge([13, 0]), "Repeated queries should return the same path")
+
+    def test_batch_pathing(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            if game.game_map.in_arena_bounds([x, 11]) and x != 20:
+                game.game_map.add_unit("FF", [x, 11])
+        for location in [[13, 6], [14, 6], [13, 4], [14, 4], [12, 5], [15, 5]]:
+            game.game_map.add_unit("FF", location)
+        friendly_edges = game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT) + game.game_map.get_edge_locations(game.game_map.BOTTOM_RIGHT)
+        starts = friendly_edges + [[13, 5], [14, 5], [13, 11], [13, 12]]
+        for target_edge in [None, game.game_map.TOP_LEFT, game.game_map.BOTTOM_RIGHT]:
+            expected = [game.find_path_to_edge(location, target_edge) for location in starts]
+            self.assertEqual(expected, game.find_paths_to_edge(starts, target_edge), "Batch paths should match single paths")
+
+    def test_path_object(self):
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0])
+        locations = [location for location in path]
+        self.assertIsInstance(path, Path)
+        self.assertEqual(locations, path, "Paths should compare equal to their list of locations")
+        self.assertEqual([13, 0], path[0])
+        self.assertEqual(locations[-3:], path[-3:])
+        self.assertTrue(path.reaches_edge)
+        self.assertTrue(all(location in path for location in locations), "Every location should be on the path")
+        self.assertTrue((13, 0) in path, "Tuples should be found on the path")
+        self.assertFalse([0, 0] in path)
+        self.assertFalse([40, 3] in path)
+        for location in [[13, 1], [14, 0]]:
+            game.game_map.add_unit("FF", location)
+        path = game.find_path_to_edge([13, 0])
+        self.assertEqual([[13, 0]], path)
+        self.assertFalse(path.reaches_edge, "Units that self destruct should not reach the edge")
+
+    def test_pockets(self):
+        game = self.make_turn_0_map()
+        for location in [[13, 6], [14, 6], [13, 4], [14, 4], [12, 5], [15, 5]]:
+            game.game_map.add_unit("FF", location)
+        self.assertTrue(game.can_reach_edge([13, 0]))
+        self.assertFalse(game.can_reach_edge([13, 5]), "Enclosed units should self destruct")
+        self.assertFalse(game.can_reach_edge([13, 6]), "Structures can not reach the edge")
+        self.assertEqual(game.pocket_id([13, 5]), game.pocket_id([14, 5]))
+        self.assertNotEqual(game.pocket_id([13, 5]), game.pocket_id([13, 0]))
+        self.assertEqual(game.pocket_id([13, 0]), game.pocket_id([20, 20]))
+        self.assertIsNone(game.pocket_id([13, 6]))
+        game.game_map.remove_unit([13, 6])
+        self.assertTrue(game.can_reach_edge([13, 5]), "Removing a wall should join the pockets")
+        self.assertEqual(game.pocket_id([13, 5]), game.pocket_id([13, 0]))
+        game.game_map.add_unit("FF", [13, 6])
+        self.assertFalse(game.can_reach_edge([14, 5]), "Placing a wall should split the pockets")
+        self.assertEqual([13, 5], game.find_path_to_edge([14, 5])[-1], "Units heading to the top left should self destruct on the left of the pocket")
+
+    def test_path_cache(self):
+        game = self.make_turn_0_map()
+        cache = PathCache(maxsize=3)
+        game.path_cache = cache
+        path = game.find_path_to_edge([13, 0])
+        self.assertEqual(path, game.find_path_to_edge([13, 0]), "Cached paths should match")
+        self.assertEqual((1, 1), (cache.hits, cache.misses), "The second lookup should hit")
+        self.assertIs(path, game.find_path_to_edge([13, 0]), "Paths can not be modified, so the cached path should be returned")
+        with self.assertRaises(TypeError):
+            path.ids[0] = 0
+        with self.assertRaises(AttributeError):
+            path.ids = (0,)
+        self.assertIn([13, 0], path, "Cached paths should not be changed by callers")
+
+        next_turn = GameState(game.config, game.serialized_string, cache)
+        next_turn.find_paths_to_edge([[13, 0], [14, 0]])
+        self.assertEqual((3, 2), (cache.hits, cache.misses), "Paths should be reused on later turns with the same layout")
+
+        next_turn.game_map.add_unit("FF", [13, 1])
+        uncached = self.make_turn_0_map()
+        uncached.game_map.add_unit("FF", [13, 1])
+        self.assertEqual(uncached.find_path_to_edge([14, 0]), next_turn.find_path_to_edge([14, 0]), "Changing the layout should not return stale paths")
+        next_turn.game_map.remove_unit([13, 1])
+        next_turn.find_path_to_edge([13, 0])
+        self.assertEqual((4, 3), (cache.hits, cache.misses), "Restoring the layout should reuse paths")
+        next_turn.find_paths_to_edge([[1, 12], [26, 12]])
+        self.assertEqual(3, cache.stats()["size"], "The cache should be bounded")
+
+    def test_path_impact(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            if game.game_map.in_arena_bounds([x, 11]) and x != 20:
+                game.game_map.add_unit("FF", [x, 11])
+        path = game.find_path_to_edge([13, 0])
+        candidates = [[20, 11], path[5], [3, 10], [10, 11], [13, 0], [13, 20], [0, 0]]
+        warnings = []
+        game.warn = warnings.append
+        impacts = game.path_impact([13, 0], candidates)
+        self.assertEqual([], warnings, "Candidates that can not be checked should be skipped quietly")
+        for location, impact in zip(candidates[:2], impacts):
+            game.game_map.add_unit("FF", location)
+            new_path = game.find_path_to_edge([13, 0])
+            game.game_map.remove_unit(location)
+            self.assertEqual(new_path, impact.path, "Impact paths should match placing the structure")
+            self.assertEqual(len(new_path) - 1, impact.path_length)
+            self.assertTrue(impact.changed, "Blocking the path should change it")
+        self.assertTrue(impacts[0].self_destructs, "Closing the only gap should cause a self destruct")
+        self.assertFalse(impacts[1].self_destructs)
+        self.assertFalse(impacts[2].changed, "Locations far from the path should not change it")
+        self.assertFalse(impacts[5].changed, "Locations behind the path should not change it")
+        self.assertEqual(path, impacts[2].path)
+        self.assertIsNone(impacts[3], "Locations holding a structure can not be checked")
+        self.assertIsNone(impacts[6], "Locations outside the arena can not be checked")
+        self.assertIsNone(impacts[4].path, "Placing a structure on the unit leaves no path")
+        self.assertEqual(path, game.find_path_to_edge([13, 0]), "Checking placements should not change the map")
+
+    def test_edge_distance_field(self):
+        game = self.make_turn_0_map()
+        field = game.edge_distance_field(game.game_map.TOP_RIGHT)
+        self.assertEqual(28, field[13, 0], "The top right edge should be 28 steps away")
+        self.assertEqual(0, field[27, 14], "Edge locations should be 0 steps away")
+        self.assertEqual(-1, field[0, 0], "Locations outside the arena should be -1")
+        self.assertIs(field, game.edge_distance_field(game.game_map.TOP_RIGHT), "The field should be cached")
+        game.game_map.add_unit("FF", [26, 14])
+        field = game.edge_distance_field(game.game_map.TOP_RIGHT)
+        self.assertEqual(-1, field[26, 14], "Structures should be -1")
+        for location in [[13, 0], [5, 9], [20, 20]]:
+            self.assertEqual(len(game.find_path_to_edge(location, game.game_map.TOP_RIGHT)) - 1, field[location], "The field should match the path length")
+
+    def test_distance_field_repair(self):
+        game = self.make_turn_0_map()
+        fields = [game.edge_distance_field(edge) for edge in range(4)]
+        changes = [("add", [13, 1]), ("add", [12, 1]), ("add", [14, 2]), ("remove", [12, 1]), ("add", [13, 0]), ("remove", [13, 1])]
+        for x in range(3, 25):
+            changes.append(("add", [x, 11]))
+        changes.append(("remove", [10, 11]))
+        for change, location in changes:
+            if change == "add":
+                game.game_map.add_unit("FF", location)
+            else:
+                game.game_map.remove_unit(location)
+            for edge in range(4):
+                self.assertIs(fields[edge], game.edge_distance_field(edge), "The field should be repaired in place")
+                expected = ShortestPathFinder().edge_distance_field(game.game_map.get_edge_locations(edge), game)
+                self.assertEqual(expected.pathlength, fields[edge].pathlength, "The repaired field should match a new one")
+
+    @unittest.skipUnless(WavefrontEngine.available(), "numpy is not installed")
+    def test_numpy_pathing_backend(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            if game.game_map.in_arena_bounds([x, 11]) and x != 20:
+                game.game_map.add_unit("FF", [x, 11])
+        game.game_map.add_unit("FF", [13, 27])
+        fields = [game.edge_distance_field(edge).pathlength for edge in range(4)]
+        paths = game.find_paths_to_edge(list(game.game_map))
+        tensor = game.edge_distance_tensor()
+        self.assertEqual((4, 28, 28), tensor.shape, "There should be one field per edge")
+        for edge in range(4):
+            self.assertEqual(fields[edge], [tensor[edge, x, y] for x, y in game.game_map], "The tensor should match the python fields")
+        game.set_pathing_backend("numpy", verify=True)
+        self.assertEqual(paths, game.find_paths_to_edge(list(game.game_map)), "Both backends should give the same paths")
+
+    def test_fork(self):
+        game = self.make_turn_0_map()
+        for x in range(5, 23):
+            game.game_map.add_unit("FF", [x, 10])
+        game.attempt_spawn("DF", [13, 12])
+        game.game_map.add_unit("PI", [13, 0])
+        path = game.find_path_to_edge([13, 0])
+
+        fork = game.fork()
+        self.assertEqual(path, fork.find_path_to_edge([13, 0]), "A fork should find the same paths")
+        fork.attempt_spawn("FF", [[4, 10], [23, 10]])
+        fork.attempt_upgrade([13, 12])
+        fork.attempt_spawn("PI", [13, 0])
+
+        self.assertFalse(game.contains_stationary_unit([4, 10]), "Spawning on a fork should not change the original map")
+        self.assertFalse(game.game_map[13, 12][0].upgraded, "Upgrading on a fork should not change the original units")
+        self.assertTrue(fork.game_map[13, 12][0].upgraded, "The fork should be upgraded")
+        self.assertEqual(1, len(game.game_map[13, 0]), "Spawning on a fork should not change the original unit lists")
+        self.assertEqual(2, len(fork.game_map[13, 0]), "The fork should have the new unit")
+        self.assertEqual([("DF", 13, 12)], game._build_stack, "The build stack should be forked")
+        self.assertEqual(23, game.get_resource(game.SP), "Resources should be forked")
+        self.assertEqual(path, game.find_path_to_edge([13, 0]), "Pathing on the original map should not change")
+
+        expected = self.make_turn_0_map()
+        for x in range(4, 24):
+            expected.game_map.add_unit("FF", [x, 10])
+        expected.game_map.add_unit("DF", [13, 12])
+        self.assertEqual(expected.find_path_to_edge([13, 0]), fork.find_path_to_edge([13, 0]), "Pathing on the fork should follow its own structures")
+        self.assertFalse(fork.can_reach_edge([13, 0]), "Pockets on the fork should follow its own structures")
+        self.assertTrue(game.can_reach_edge([13, 0]), "Pockets on the original map should not change")
+
+        game.game_map.remove_unit([13, 12])
+        self.assertTrue(fork.contains_stationary_unit([13, 12]), "Changing the original map should not change the fork")
+
+    def test_units_of(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [3, 14], 1)
+        game.game_map.add_unit("DF", [20, 16], 1)
+        game.game_map.add_unit("FF", [5, 16], 1)
+        game.attempt_spawn("DF", [[13, 5], [14, 5]])
+        self.assertEqual([[13, 5], [14, 5]], [[unit.x, unit.y] for unit in game.game_map.units_of(0, "DF")], "Our turrets should be found")
+
+        game.attempt_upgrade([14, 5])
+        game.game_map.add_unit("PI", [13, 0], num=3)
+        self.assertEqual([[14, 5]], [[unit.x, unit.y] for unit in game.game_map.units_of(0, "DF", True)], "Upgrades should move units in the index")
+        self.assertEqual(3, len(game.game_map.units_of(0, "PI")), "Every unit in a stack should be found")
+        self.assertEqual(3, len(game.game_map.units_of(1, ["DF", "FF"])), "Several types should be found at once")
+        left = [[x, y] for x in range(8) for y in range(14, 17)]
+        self.assertEqual([[3, 14], [5, 16]], [[unit.x, unit.y] for unit in game.game_map.units_of(1, region=left)], "Only units in the region should be found")
+
+        fork = game.fork()
+        fork.game_map.remove_unit([3, 14])
+        self.assertEqual(1, len(fork.game_map.units_of(1, "DF")), "Removed units should leave the index")
+        self.assertEqual(2, len(game.game_map.units_of(1, "DF")), "The index of a fork should be separate")
+
+    def test_threat_map(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 16], 1)
+        game.game_map.add_unit("DF", [15, 16], 1)
+        game.game_map.add_unit("FF", [14, 15], 1)
+        game.game_map.add_unit("DF", [13, 11], 0)
+        threat = game.threat_map(0)
+        for location in game.game_map:
+            attackers = game.get_attackers(location, 0)
+            self.assertEqual(len(attackers), threat.attackers[tile_id(location)], "Attackers should match get_attackers at {}".format(location))
+            self.assertEqual(sum(unit.damage_i for unit in attackers), threat.damage_i[tile_id(location)], "Damage should match get_attackers at {}".format(location))
+        self.assertEqual(10, threat.damage_i[tile_id([14, 14])], "Both turrets should reach [14, 14]")
+        self.assertEqual(10, threat.path_damage([[14, 14], [14, 13], [13, 13]]), "Path damage should sum the damage on every location")
+        self.assertIs(threat, game.threat_map(0), "The threat map should be cached")
+
+        game.game_map.add_unit("DF", [14, 16], 1)
+        self.assertEqual(15, game.threat_map(0).damage_i[tile_id([14, 14])], "New turrets should be added to the threat map")
+
+    def test_threat_map_updates(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 16], 1)
+        threat = game.threat_map(1)
+        fork = game.fork()
+        fork.attempt_spawn("DF", [13, 11])
+        self.assertEqual(5, fork.threat_map(1).damage_i[tile_id([13, 13])], "A new turret should be stamped onto the threat map")
+        fork.attempt_upgrade([13, 11])
+        self.assertEqual(15, fork.threat_map(1).damage_i[tile_id([13, 14])], "Upgrades should restamp the range of a turret")
+        self.assertEqual(1, fork.threat_map(1).attackers[tile_id([13, 14])], "The old range of an upgraded turret should be taken away")
+        fork.game_map.remove_unit([13, 11])
+        self.assertEqual([0] * TILE_COUNT, fork.threat_map(1).attackers, "Removed turrets should leave the threat map")
+        self.assertIs(threat, game.threat_map(1), "Changing a fork should not change the original threat map")
+        self.assertEqual([0] * TILE_COUNT, threat.attackers, "Changing a fork should not change the original threat map")
+
+        expected = self.make_turn_0_map()
+        expected.game_map.add_unit("DF", [13, 16], 1)
+        fork.game_map.add_unit("PI", [14, 14], 1, 3)
+        expected.game_map.add_unit("PI", [14, 14], 1, 3)
+        self.assertEqual(expected.threat_map(0).damage_f, fork.threat_map(0).damage_f, "Updated threat maps should match new ones")
+
+    def test_direct_upgrades(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 16], 1)
+        self.assertEqual([], game.get_attackers([13, 13], 0))
+        self.assertEqual(0, game.threat_map(0).damage_i[tile_id([13, 13])])
+        fork = game.fork()
+        fork.get_attackers([13, 13], 0)
+        game.game_map[13, 16][0].upgrade()
+        self.assertEqual([[13, 16]], [[unit.x, unit.y] for unit in game.get_attackers([13, 13], 0)], "Upgrading a unit directly should update the attackers")
+        self.assertEqual(15, game.threat_map(0).damage_i[tile_id([13, 13])], "Upgrading a unit directly should update the threat map")
+        self.assertEqual(1, len(fork.get_attackers([13, 13], 0)), "Maps sharing an upgraded unit should see the upgrade")
+
+    def test_shield_map(self):
+        game = self.make_turn_0_map()
+        support = game.config["unitInformation"][1]
+        support.update({"shieldRange": 3.5, "shieldPerUnit": 3.0})
+        support["upgrade"].update({"shieldRange": 7.0, "shieldPerUnit": 2.0, "shieldBonusPerY": 0.5})
+        game.game_map.add_unit("EF", [13, 10])
+        game.game_map.add_unit("EF", [14, 17], 1)
+        shield = game.shield_map(0)
+        self.assertEqual(3, shield.shield[tile_id([13, 13])], "Supports should shield the tiles in their range")
+        self.assertEqual(0, shield.shield[tile_id([13, 14])], "Supports should not shield tiles out of their range")
+        self.assertEqual(3, game.shield_map(1).shield[tile_id([14, 14])], "Enemy supports should shield enemy units")
+
+        game.game_map.edit_units([13, 10])[0].upgrade()
+        shield = game.shield_map(0)
+        self.assertEqual(7, shield.shield[tile_id([13, 16])], "Upgrades should add the bonus for the y position of the support")
+        self.assertEqual(7, shield.path_shield([[13, 12], [13, 13], [13, 14]]), "Every support should shield a unit once along a path")
+        game.game_map.remove_unit([13, 10])
+        self.assertEqual([0] * TILE_COUNT, game.shield_map(0).shield, "Removed supports should leave the shield map")
+
+    def test_get_attackers_along(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [14, 16], 1)
+        game.game_map.add_unit("DF", [13, 16], 1)
+        game.game_map.add_unit("DF", [13, 12], 0)
+        attackers = game.get_attackers([13, 14], 0)
+        self.assertEqual([[13, 16], [14, 16]], [[unit.x, unit.y] for unit in attackers], "Attackers should be ordered by location")
+
+        along = game.get_attackers_along([[13, 14], [13, 15], [15, 14]], 0)
+        self.assertEqual([([13, 16], 2), ([14, 16], 3)], [([unit.x, unit.y], tiles) for unit, tiles in along], "Every attacker should be counted once per location")
+
+        fork = game.fork()
+        fork.game_map.remove_unit([13, 16])
+        self.assertEqual(1, len(fork.get_attackers([13, 14], 0)), "Removed units should stop attacking")
+        self.assertEqual(2, len(game.get_attackers([13, 14], 0)), "Changing a fork should not change the original attackers")
+
+    def test_simulation(self):
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0])
+        result = Simulator(game).simulate([("PI", [13, 0], 5)])
+        self.assertEqual(5, result.units[0].breached, "Unopposed units should breach")
+        self.assertEqual([5, 0], result.breaches, "Breaches should be counted per player")
+        self.assertEqual([0, 5], result.player_damage, "Breaches should damage the other player")
+        self.assertEqual(len(path) - 1, result.frames, "Scouts should move once per frame")
+
+        game.game_map.add_unit("DF", [24, 14], 1)
+        game.game_map.add_unit("FF", [23, 14], 1)
+        game.attempt_spawn("PI", [13, 0], 3)
+        result = Simulator(game).simulate([("EI", [14, 0], 2)])
+        self.assertEqual(["PI", "EI"], [unit.unit_type for unit in result.units], "Units on the map should be simulated before deploys")
+        for unit in result.units:
+            self.assertEqual(unit.count, unit.breached + unit.self_destructed + unit.destroyed, "Every unit should end the action phase once")
+        self.assertTrue(result.structure_damage, "Mobile units should attack structures in range")
+        self.assertEqual(90, game.game_map[24, 14][0].health, "Simulating should not change the game state")
+        self.assertEqual(3, len(game.game_map[13, 0]), "Simulating should not change the game state")
+
+    @unittest.skipUnless(BatchSimulator.available(), "numpy is not installed")
+    def test_batch_simulation(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [24, 14], 1)
+        game.game_map.add_unit("FF", [23, 14], 1)
+        plans = [[("PI", [13, 0], 5)], [("EI", [14, 0], 2)], [("PI", [13, 0], 3), ("EI", [14, 0], 2)], []]
+        result = BatchSimulator(game).simulate(plans)
+        for index, plan in enumerate(plans[:3]):
+            exact = Simulator(game).simulate(plan)
+            self.assertEqual(exact.breaches[0], result.breaches[index], "Plans without destroyed structures should breach like the exact simulation")
+            self.assertAlmostEqual(sum(unit.damage_dealt for unit in exact.units), result.damage_dealt[index], msg="Plans should deal the damage of the exact simulation")
+        self.assertEqual(0, result.breaches[3], "Empty plans should do nothing")
+        self.assertEqual(90, game.game_map[24, 14][0].health, "Simulating should not change the game state")
+
+    @unittest.skipUnless(BoardArrays.available(), "numpy is not installed")
+    def test_board_arrays(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 12])
+        board = game.game_map.board
+        turret = board.type_code("DF")
+        self.assertEqual([[13, 12]], board.locations(board.structure_type == turret), "The board should be filled on first use")
+
+        game.game_map.add_unit("FF", [10, 12])
+        game.game_map.add_unit("DF", [14, 15], 1)
+        game.game_map.add_unit("PI", [14, 15], 1)
+        game.game_map.add_unit("PI", [14, 15], 1)
+        game.game_map.add_unit("SI", [3, 10])
+        board = game.game_map.board
+        self.assertEqual([[13, 12], [14, 15]], board.locations(board.structure_type == turret), "Added structures should be on the board")
+        self.assertEqual([[14, 15]], board.locations(board.owner == 1), "The board should know who owns each structure")
+        self.assertEqual(2, board.mobile_counts[1, board.type_code("PI") - board.MOBILE_OFFSET, tile_id([14, 15])], "Mobile units should be counted")
+        self.assertEqual(1, board.mobile_counts[0].sum(), "Mobile units should be counted per player")
+
+        game.attempt_upgrade([13, 12])
+        board = game.game_map.board
+        self.assertTrue(board.upgraded[tile_id([13, 12])], "Upgrades should be on the board")
+        self.assertEqual(game.game_map[13, 12][0].health, board.health[tile_id([13, 12])], "Upgrades should change the health on the board")
+
+        game.game_map[10, 12][0].health = 1
+        game.game_map.unit_changed(game.game_map[10, 12][0])
+        board = game.game_map.board
+        self.assertEqual([[10, 12]], board.locations(board.health < board.max_health), "Changed units should be updated on the board")
+
+        game.game_map.remove_unit([13, 12])
+        board = game.game_map.board
+        in_region = (board.owner == 0) & (board.y >= 10) & (board.y <= 13)
+        self.assertEqual([[10, 12]], board.locations(in_region), "Removed structures should leave the board")
+
     def test_print_unit(self):
         game = self.make_turn_0_map()
 
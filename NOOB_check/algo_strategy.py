@@ -17,7 +17,8 @@ Advanced strategy tips:
 
   - The GameState.map object can be manually manipulated to create hypothetical 
   board states. Though, we recommended making a copy of the map to preserve 
-  the actual current map state.
+  the actual current map state. game_state.fork() makes a cheap copy of the 
+  whole GameState to try hypothetical moves on.
 """
 
 
@@ -64,7 +65,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = gamelib.GameState(self.config, turn_state, self.path_cache)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(
             game_state.turn_number))
         # Comment or remove this line to enable warnings.
@@ -84,20 +85,10 @@ class AlgoStrategy(gamelib.AlgoCore):
         right_turret_locations = [(y, 14) for y in range(20, 28)] + [(y, 15) for y in range(20, 28)] + [(y, 16) for y in range(20, 28)]
         
         # Check left half for upgraded turrets
-        left_upgraded_turret_found = False
-        for location in left_turret_locations:
-            unit = game_state.contains_stationary_unit(location)
-            if unit and unit.unit_type == TURRET and unit.upgraded:
-                left_upgraded_turret_found = True
-                break
+        left_upgraded_turret_found = len(game_state.game_map.units_of(unit_type=TURRET, upgraded=True, region=left_turret_locations)) > 0
         
         # Check right half for upgraded turrets
-        right_upgraded_turret_found = False
-        for location in right_turret_locations:
-            unit = game_state.contains_stationary_unit(location)
-            if unit and unit.unit_type == TURRET and unit.upgraded:
-                right_upgraded_turret_found = True
-                break
+        right_upgraded_turret_found = len(game_state.game_map.units_of(unit_type=TURRET, upgraded=True, region=right_turret_locations)) > 0
 
         if not left_upgraded_turret_found:
             game_state.attempt_spawn(DEMOLISHER, [2, 11], 1000)
@@ -110,7 +101,7 @@ class AlgoStrategy(gamelib.AlgoCore):
             game_state.attempt_upgrade([22,10])
 
         else:
-            tup = self.least_damage_spawn_location(game_state, [[2, 11], [25,11]])
+            tup = self.least_damage_spawn_location(game_state, [[2, 11], [25,11]], DEMOLISHER)
             if not tup: loc = [2, 11]
             else: loc = tup[0]
             if loc[0] == 2: x = 5
@@ -132,9 +123,10 @@ class AlgoStrategy(gamelib.AlgoCore):
             self.send_scouts(game_state)
             return
         
-        best_location, best_damage = tup
+        best_location, best_losses = tup
         
-        if best_damage > 400:
+        # Scouts are not worth sending once the safest path costs as many of them as 400 damage to unshielded scouts
+        if best_losses > 400 / gamelib.GameUnit(SCOUT, game_state.config).max_health:
             self.left_right(game_state)
         else:
             self.send_scouts(game_state)
@@ -208,14 +200,15 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def restall_low_health(self, game_state):
         low_health_threshold = 0.5
-        for i in range(28):
-            for j in range(28):
-                loc = [i, j]
-                if game_state.game_map.in_arena_bounds(loc):
-                    for unit in game_state.game_map[i, j]:
-                        if unit.health < unit.max_health * low_health_threshold and unit.unit_type == TURRET:
-                            game_state.attempt_remove(loc)
-                            self.reinforce_location(game_state, loc)
+        board = game_state.game_map.board
+        if board is not None:
+            locations = board.locations((board.structure_type == board.type_code(TURRET)) & (board.health < board.max_health * low_health_threshold))
+        else:
+            locations = [[unit.x, unit.y] for unit in game_state.game_map.structures() if unit.unit_type == TURRET and unit.health < unit.max_health * low_health_threshold]
+        # Same order as scanning the columns of the map
+        for loc in sorted(locations):
+            game_state.attempt_remove(loc)
+            self.reinforce_location(game_state, loc)
 
     def reinforce_location(self, game_state, loc):
         illegal_locs = [[0,13],[1,13],[26,13],[27,13]]
@@ -291,25 +284,29 @@ class AlgoStrategy(gamelib.AlgoCore):
                     gamelib.GameUnit(TURRET, game_state.config).damage_i
         return damage
 
-    def least_damage_spawn_location(self, game_state, location_options):
+    def least_damage_spawn_location(self, game_state, location_options, unit_type=None):
         """
         This function will help us guess which location is the safest to spawn moving units from.
         It gets the path the unit will take then checks locations on that path to 
-        estimate the path's damage risk.
+        estimate the path's damage risk, as the number of units of unit_type (scouts by default)
+        we expect to lose: the damage taken along the path over the health of one unit plus the
+        shield it collects on the way.
         """
         damages = []
         # Get the damage estimate each path will take
         if not location_options or not any(location_options):
             return location_options
 
-        for location in location_options:
-            path = game_state.find_path_to_edge(location)
+        paths = game_state.find_paths_to_edge(location_options)
+        # The damage enemy units can deal on every location, built once for all paths
+        threat = game_state.threat_map(0)
+        # The shield our supports give along a path adds to the health of every unit walking it
+        shield = game_state.shield_map(0)
+        health = gamelib.GameUnit(unit_type or SCOUT, game_state.config).max_health
+        for location, path in zip(location_options, paths):
             damage = 0
             if path and any(path):
-                for path_location in path:
-                    for attacker in game_state.get_attackers(path_location, 0):
-                        if attacker.unit_type == TURRET:
-                            damage += attacker.damage_i
+                damage = threat.path_damage(path) / (health + shield.path_shield(path))
             damages.append(damage)
 
         if not damages or not any(damages):
@@ -319,11 +316,9 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def detect_enemy_unit(self, game_state, unit_type=None, valid_x=None, valid_y=None):
         total_units = 0
-        for location in game_state.game_map:
-            if game_state.contains_stationary_unit(location):
-                for unit in game_state.game_map[location]:
-                    if unit.player_index == 1 and (unit_type is None or unit.unit_type == unit_type) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
-                        total_units += 1
+        for unit in game_state.game_map.units_of(1, unit_type):
+            if unit.stationary and (valid_x is None or unit.x in valid_x) and (valid_y is None or unit.y in valid_y):
+                total_units += 1
         return total_units
 
     def filter_blocked_locations(self, locations, game_state):
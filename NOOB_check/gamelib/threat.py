@@ -0,0 +1,80 @@
+from .tiles import TILE_COUNT, path_ids
+
+
+class ThreatMap:
+    """The damage the enemies of one player can deal on every tile of the arena, with one entry per tile id (see tiles.py)
+
+    A unit threatens every tile within its attackRange, the same units GameState.get_attackers returns for a location.
+    The map is built by stamping the range of every attacking unit onto the arena once, so the threat to a whole path
+    is a sum of lookups. Afterwards GameMap adds and takes away the range of single attackers as units change, 
+    see GameMap.threat_map and GameState.threat_map.
+
+    Attributes :
+        * player_index (int): The defending player, 0 for you 1 for the enemy. Units of the other player are the attackers
+        * damage_i (list): The summed damage_i of the attackers that can hit a mobile unit on every tile
+        * damage_f (list): The summed damage_f of the attackers that can hit a structure on every tile
+        * attackers (list): The number of attackers that can hit every tile
+
+    """
+    def __init__(self, player_index):
+        self.player_index = player_index
+        self.damage_i = [0] * TILE_COUNT
+        self.damage_f = [0] * TILE_COUNT
+        self.attackers = [0] * TILE_COUNT
+
+    def stamp(self, tiles, damage_i, damage_f, attackers=1):
+        """Adds attackers to the tiles in their range. Negative values take attackers away again
+
+        Args:
+            tiles: The tile ids within the attackRange of the attackers
+            damage_i: The summed damage_i of the attackers
+            damage_f: The summed damage_f of the attackers
+            attackers: The number of attackers
+
+        """
+        map_damage_i = self.damage_i
+        map_damage_f = self.damage_f
+        map_attackers = self.attackers
+        for tile in tiles:
+            map_damage_i[tile] += damage_i
+            map_damage_f[tile] += damage_f
+            map_attackers[tile] += attackers
+
+    def path_damage(self, path):
+        """Sums damage_i over the locations of a path
+
+        Args:
+            path: A Path, or a list of locations
+
+        Returns:
+            The damage a mobile unit would take if every attacker in range hit it once on every location of the path
+
+        """
+        damage_i = self.damage_i
+        return sum(damage_i[tile] for tile in path_ids(path))
+
+    def path_attackers(self, path):
+        """Sums the number of attackers over the locations of a path
+
+        Args:
+            path: A Path, or a list of locations
+
+        Returns:
+            The number of attacks a mobile unit would receive if every attacker in range hit it once on every location of the path
+
+        """
+        attackers = self.attackers
+        return sum(attackers[tile] for tile in path_ids(path))
+
+    def copy(self):
+        """Copies the map
+
+        Returns:
+            A new ThreatMap with the same entries
+
+        """
+        threat = ThreatMap(self.player_index)
+        threat.damage_i = self.damage_i[:]
+        threat.damage_f = self.damage_f[:]
+        threat.attackers = self.attackers[:]
+        return threat
@@ -1,3 +1,6 @@
+from .tiles import tile_id
+
+
 def is_stationary(unit_type, structure_types):
     """
         Args:
@@ -43,6 +46,8 @@ class GameUnit:
         self.upgraded = False
         self.x = x
         self.y = y
+        #The upgrade log of the maps holding this unit, set by GameMap, see GameMap.unit_changed
+        self._upgrade_log = None
         self.__serialize_type()
         self.health = self.max_health if not health else health
 
@@ -74,6 +79,8 @@ class GameUnit:
         self.shieldBonusPerY = type_config.get("shieldBonusPerY", self.shieldBonusPerY)
         self.cost = [type_config.get("cost1", 0) + self.cost[0], type_config.get("cost2", 0) + self.cost[1]]
         self.upgraded = True
+        if self._upgrade_log is not None:
+            self._upgrade_log.append(tile_id([self.x, self.y]))
 
 
     def __toString(self):
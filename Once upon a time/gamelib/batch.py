@@ -0,0 +1,209 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from collections import namedtuple
+
+from .tiles import TILE_COUNT, TILE_X, TILE_Y, EDGE_BITS, tile_id
+from .simulation import _MOVE_EPSILON
+
+BatchResult = namedtuple("BatchResult", ["breaches", "damage_dealt", "destroyed", "lost"])
+BatchResult.__doc__ = """The outcome of every plan of a batch simulation, see BatchSimulator.simulate. Every entry is an array with one value per plan
+
+Attributes :
+    * breaches (array): The number of units that reached their target edge
+    * damage_dealt (array): The health the units took from enemy structures, overkill excluded
+    * destroyed (array): The number of enemy structures destroyed
+    * lost (array): The number of units destroyed or self destructed
+"""
+
+class BatchSimulator:
+    """Simulates many candidate attacks against the same board at once, as NumPy arrays with one row per stack of units
+
+    Follows the frame order of Simulator, with the shortcuts that make the plans independent of each other
+    so every frame is a handful of array operations over all plans:
+
+    * Units keep the path they would take on the board at the start of the action phase, they do not re-path when structures are destroyed
+    * Every enemy turret in range hits every stack of a plan, through a table of the damage_i each structure deals on each tile
+    * Shields come from GameState.shield_map, as the shield collected up to every location of every path
+    * Stacks target the first living structure of a per-tile priority list. It follows GameState.get_target,
+      except that structures at the same distance are not ordered by health
+
+    Each plan keeps the health of every enemy structure, so structures destroyed by a plan stop shooting in that plan only.
+    Use it to screen many plans, then check the best ones with Simulator. Requires numpy, see BatchSimulator.available().
+
+    Attributes :
+        * game_state (:obj: GameState): The state the action phase starts from
+        * player_index (int): The player deploying the plans, 0 for you 1 for the enemy
+
+    """
+    def __init__(self, game_state, player_index=0):
+        if np is None:
+            raise ImportError("BatchSimulator requires numpy")
+        self.game_state = game_state
+        self.player_index = player_index
+        self.__unit_information = dict((unit_information.get("shorthand"), unit_information) for unit_information in game_state.config["unitInformation"])
+
+        #The enemy structures, with a dummy structure at the end that is never alive, so padded lists can point at it
+        game_map = game_state.game_map
+        self.__structures = [unit for tile in range(TILE_COUNT) if game_map.structure_mask[tile] for unit in game_map.tile_units(tile)
+                             if unit.stationary and unit.player_index != player_index]
+        self.__structure_index = dict((tile_id([unit.x, unit.y]), index) for index, unit in enumerate(self.__structures))
+        self.__dummy = len(self.__structures)
+        self.__health = np.array([unit.health for unit in self.__structures] + [0.0])
+        #The damage_i every structure deals to a mobile unit on every tile
+        self.__threat = np.zeros((TILE_COUNT, self.__dummy + 1))
+        for index, unit in enumerate(self.__structures):
+            if unit.damage_i > 0:
+                tiles = list(game_map.get_tile_ids_in_range([unit.x, unit.y], unit.attackRange))
+                self.__threat[tiles, index] = unit.damage_i
+        self.__paths = {}
+        self.__targets = {}
+        self.__explosions = {}
+
+    @staticmethod
+    def available():
+        """Returns True if numpy could be imported
+        """
+        return np is not None
+
+    def simulate(self, plans):
+        """Simulates every plan against the board of game_state
+
+        Args:
+            plans: A list of plans, each a list of (unit_type, location, num) tuples of mobile units to deploy
+
+        Returns:
+            A BatchResult
+
+        """
+        stacks = []
+        for plan_index, plan in enumerate(plans):
+            for unit_type, location, num in plan:
+                info = self.__unit_information.get(unit_type)
+                path = self.__path(location)
+                if info is None or info.get("unitCategory") == 0 or path is None or num < 1:
+                    self.game_state.warn("Could not simulate {} {} at {}, expected mobile units on an empty location in the arena".format(num, unit_type, location))
+                    continue
+                stacks.append((plan_index, info, path, num))
+        plan_count = len(plans)
+        if not stacks:
+            zeros = np.zeros(plan_count)
+            return BatchResult(zeros.astype(int), zeros, zeros.astype(int), zeros.astype(int))
+
+        #One row per stack. Paths are padded with their last tile
+        plan_of = np.array([plan_index for plan_index, _, _, _ in stacks])
+        count = np.array([num for _, _, _, num in stacks])
+        speed = np.array([info.get("speed", 0) for _, info, _, _ in stacks], dtype=float)
+        health = np.array([info.get("startHealth", 0) for _, info, _, _ in stacks], dtype=float)
+        damage_f = np.array([info.get("attackDamageTower", 0) for _, info, _, _ in stacks], dtype=float)
+        explosion_damage = np.array([info.get("selfDestructDamageTower", 0) for _, info, _, _ in stacks], dtype=float)
+        steps_required = np.array([info.get("selfDestructStepsRequired", 0) for _, info, _, _ in stacks])
+        ends = np.array([len(path[0]) - 1 for _, _, path, _ in stacks])
+        breaches_at_end = np.array([path[1] for _, _, path, _ in stacks])
+        length = ends.max() + 1
+        tiles = np.array([path[0] + [path[0][-1]] * (length - len(path[0])) for _, _, path, _ in stacks])
+        shields = np.array([path[2] + [path[2][-1]] * (length - len(path[2])) for _, _, path, _ in stacks], dtype=float)
+        #The structures each stack targets from every location of its path, padded with the dummy structure
+        attack_ranges = np.array([info.get("attackRange", 0) for _, info, _, _ in stacks])
+        target_tables = dict((attack_range, self.__target_table(attack_range)) for attack_range in set(attack_ranges.tolist()))
+        width = max(table.shape[1] for table in target_tables.values())
+        targets = np.full((len(stacks), length, width), self.__dummy)
+        for attack_range, table in target_tables.items():
+            group = attack_ranges == attack_range
+            targets[group, :, :table.shape[1]] = table[tiles[group]]
+        rows = np.arange(len(stacks))
+
+        structure_health = np.tile(self.__health, (plan_count, 1))
+        start_health = structure_health.copy()
+        breaches = np.zeros(plan_count, dtype=int)
+        lost = np.zeros(plan_count, dtype=int)
+        position = np.zeros(len(stacks), dtype=int)
+        front_damage = np.zeros(len(stacks))
+        frame = 0
+        while count.any():
+            frame += 1
+            #Shielding, from every support met up to the location a stack starts the frame on
+            stack_health = health + shields[rows, position]
+            #Structures destroyed this frame keep shooting until the end of it
+            alive = structure_health > 0
+
+            #Movement
+            moves = np.floor(frame * speed + _MOVE_EPSILON).astype(int)
+            stuck = (count > 0) & (moves > ends)
+            for row in np.flatnonzero(stuck):
+                if position[row] >= steps_required[row]:
+                    structures = self.__explosion_list(stacks[row][1].get("selfDestructRange", 0))[tiles[row, position[row]]]
+                    structure_health[plan_of[row], structures] -= explosion_damage[row] * count[row]
+            np.add.at(lost, plan_of[stuck], count[stuck])
+            count[stuck] = 0
+            active = count > 0
+            position = np.where(active, np.minimum(moves, ends), position)
+            arrived = active & breaches_at_end & (position == ends)
+            np.add.at(breaches, plan_of[arrived], count[arrived])
+            count[arrived] = 0
+
+            #Attacks. Every turret in range hits every stack, stacks hit the first living structure they target
+            active = count > 0
+            here = tiles[rows, position]
+            front_damage += np.where(active, (self.__threat[here] * alive[plan_of]).sum(axis=1), 0)
+            candidates = targets[rows, position]
+            living = alive[plan_of[:, None], candidates]
+            attacking = active & (damage_f > 0) & living.any(axis=1)
+            first = candidates[rows, living.argmax(axis=1)]
+            np.subtract.at(structure_health, (plan_of[attacking], first[attacking]), (damage_f * count)[attacking])
+
+            #Deaths, only the front unit of a stack takes hits
+            dead = active & (front_damage >= stack_health)
+            count[dead] -= 1
+            front_damage[dead] = 0
+            np.add.at(lost, plan_of[dead], 1)
+
+        damage_dealt = (np.clip(start_health, 0, None) - np.clip(structure_health, 0, None)).sum(axis=1)
+        destroyed = ((start_health > 0) & (structure_health <= 0)).sum(axis=1)
+        return BatchResult(breaches, damage_dealt, destroyed, lost)
+
+    def __path(self, location):
+        """The tile ids of the path from a location, whether it ends on the target edge, and the shield collected up to each of its locations
+        """
+        key = tuple(location)
+        if key not in self.__paths:
+            path = None
+            if tile_id(location) != -1 and not self.game_state.contains_stationary_unit(location):
+                edge = self.game_state.get_target_edge(location)
+                ids = list(self.game_state.find_path_to_edge(location, edge).ids)
+                #Units breach on the first location of their target edge
+                breach = next((index for index, tile in enumerate(ids) if index > 0 and EDGE_BITS[tile] & (1 << edge)), None)
+                if breach is not None:
+                    ids = ids[:breach + 1]
+                shield_map = self.game_state.shield_map(self.player_index)
+                supports = set()
+                shields = []
+                for tile in ids:
+                    supports.update(shield_map.supports[tile])
+                    shields.append(sum(shield_map.yields[support] for support in supports))
+                path = (ids, breach is not None, shields)
+            self.__paths[key] = path
+        return self.__paths[key]
+
+    def __target_table(self, attack_range):
+        """For every tile, the enemy structures in range in the order a unit targets them, as an array padded with the dummy structure
+        """
+        if attack_range not in self.__targets:
+            game_map = self.game_state.game_map
+            structure_index = self.__structure_index
+            lists = [[structure_index[target] for tier in game_map.get_target_tiers([TILE_X[tile], TILE_Y[tile]], attack_range, self.player_index)
+                      for target in tier if target in structure_index] for tile in range(TILE_COUNT)]
+            width = max(1, max(len(targets) for targets in lists))
+            self.__targets[attack_range] = np.array([targets + [self.__dummy] * (width - len(targets)) for targets in lists], dtype=int)
+        return self.__targets[attack_range]
+
+    def __explosion_list(self, explosion_range):
+        """For every tile, the enemy structures a unit self destructing there damages
+        """
+        if explosion_range not in self.__explosions:
+            game_map = self.game_state.game_map
+            self.__explosions[explosion_range] = [[self.__structure_index[target] for target in game_map.get_tile_ids_in_range([TILE_X[tile], TILE_Y[tile]], explosion_range)
+                                                   if target in self.__structure_index] for tile in range(TILE_COUNT)]
+        return self.__explosions[explosion_range]
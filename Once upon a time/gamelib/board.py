@@ -0,0 +1,167 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .tiles import TILE_COUNT, TILE_X, TILE_Y, GRID_IDS, ARENA_SIZE
+
+
+class BoardArrays:
+    """The units of a GameMap as numpy arrays, with one entry per tile id (see tiles.py)
+
+    Lets strategies query the whole board at once instead of walking GameUnit objects. For example,
+    the total health of enemy turrets in rows 14 to 16:
+
+        board = game_state.game_map.board
+        turret = board.type_code(TURRET)
+        board.health[(board.owner == 1) & (board.structure_type == turret) & (board.y >= 14) & (board.y <= 16)].sum()
+
+    and the locations of all damaged friendly turrets:
+
+        board.locations((board.owner == 0) & (board.structure_type == turret) & (board.health < board.max_health))
+
+    GameMap keeps the arrays in sync with its unit lists, see GameMap.board. Requires numpy, see BoardArrays.available().
+
+    Attributes :
+        * x (array): The x coordinate of every tile
+        * y (array): The y coordinate of every tile
+        * owner (array): The player index of the structure on every tile, -1 for tiles without a structure
+        * structure_type (array): The type code of the structure on every tile, -1 for tiles without a structure. See type_code
+        * health (array): The health of the structure on every tile, 0 for tiles without a structure
+        * max_health (array): The starting health of the structure on every tile, 0 for tiles without a structure
+        * upgraded (array): True for tiles with an upgraded structure
+        * pending_removal (array): True for tiles with a structure marked for removal by its owner
+        * mobile_counts (array): The number of mobile units on every tile, indexed [player_index, type_code - MOBILE_OFFSET, tile]
+
+    """
+    MOBILE_OFFSET = 3
+    MOBILE_TYPES = 3
+
+    def __init__(self, config):
+        if np is None:
+            raise ImportError("BoardArrays requires numpy")
+        self._type_codes = dict((unit_information.get("shorthand"), index) for index, unit_information in enumerate(config["unitInformation"]))
+        self.x = np.array(TILE_X, dtype=np.int8)
+        self.y = np.array(TILE_Y, dtype=np.int8)
+        self.owner = np.full(TILE_COUNT, -1, dtype=np.int8)
+        self.structure_type = np.full(TILE_COUNT, -1, dtype=np.int8)
+        self.health = np.zeros(TILE_COUNT)
+        self.max_health = np.zeros(TILE_COUNT)
+        self.upgraded = np.zeros(TILE_COUNT, dtype=bool)
+        self.pending_removal = np.zeros(TILE_COUNT, dtype=bool)
+        self.mobile_counts = np.zeros((2, self.MOBILE_TYPES, TILE_COUNT), dtype=np.int16)
+
+    @staticmethod
+    def available():
+        """Returns True if numpy could be imported
+        """
+        return np is not None
+
+    def type_code(self, unit_type):
+        """Gets the code of a unit type, as stored in structure_type
+
+        Args:
+            unit_type: A unit type, for example TURRET
+
+        Returns:
+            The index of the unit type in the unitInformation of the config
+
+        """
+        return self._type_codes[unit_type]
+
+    def locations(self, mask):
+        """Gets the locations selected by a boolean mask over the tiles
+
+        Args:
+            mask: A boolean array with one entry per tile id
+
+        Returns:
+            A list of [x, y] locations, in the order the map is iterated in
+
+        """
+        return [[TILE_X[tile], TILE_Y[tile]] for tile in np.flatnonzero(mask).tolist()]
+
+    def copy(self):
+        """Copies the arrays
+
+        Returns:
+            A new BoardArrays with the same entries
+
+        """
+        board = BoardArrays.__new__(BoardArrays)
+        board._type_codes = self._type_codes
+        board.x = self.x
+        board.y = self.y
+        board.owner = self.owner.copy()
+        board.structure_type = self.structure_type.copy()
+        board.health = self.health.copy()
+        board.max_health = self.max_health.copy()
+        board.upgraded = self.upgraded.copy()
+        board.pending_removal = self.pending_removal.copy()
+        board.mobile_counts = self.mobile_counts.copy()
+        return board
+
+    def update_tile(self, tile, units):
+        """Sets the entries of a tile from the units on it
+
+        Args:
+            tile: A tile id
+            units: The list of GameUnits on the tile
+
+        """
+        self.owner[tile] = -1
+        self.structure_type[tile] = -1
+        self.health[tile] = 0
+        self.max_health[tile] = 0
+        self.upgraded[tile] = False
+        self.pending_removal[tile] = False
+        self.mobile_counts[:, :, tile] = 0
+        for unit in units:
+            self._add_unit(tile, unit)
+
+    def fill(self, units):
+        """Sets every entry from scratch
+
+        Args:
+            units: Every GameUnit on the map
+
+        """
+        self.owner.fill(-1)
+        self.structure_type.fill(-1)
+        self.health.fill(0)
+        self.max_health.fill(0)
+        self.upgraded.fill(False)
+        self.pending_removal.fill(False)
+        self.mobile_counts.fill(0)
+
+        #Gather the columns in python, then write each array once
+        structures = []
+        mobile = []
+        for unit in units:
+            tile = GRID_IDS[unit.x * ARENA_SIZE + unit.y]
+            if unit.stationary:
+                structures.append((tile, unit.player_index, self._type_codes[unit.unit_type], unit.health, unit.max_health, unit.upgraded, unit.pending_removal))
+            else:
+                mobile.append((unit.player_index, self._type_codes[unit.unit_type] - self.MOBILE_OFFSET, tile))
+        if structures:
+            tiles, owner, structure_type, health, max_health, upgraded, pending_removal = zip(*structures)
+            tiles = list(tiles)
+            self.owner[tiles] = owner
+            self.structure_type[tiles] = structure_type
+            self.health[tiles] = health
+            self.max_health[tiles] = max_health
+            self.upgraded[tiles] = upgraded
+            self.pending_removal[tiles] = pending_removal
+        if mobile:
+            np.add.at(self.mobile_counts, tuple(zip(*mobile)), 1)
+
+    def _add_unit(self, tile, unit):
+        if unit.stationary:
+            self.owner[tile] = unit.player_index
+            self.structure_type[tile] = self._type_codes[unit.unit_type]
+            self.health[tile] = unit.health
+            self.max_health[tile] = unit.max_health
+            self.upgraded[tile] = unit.upgraded
+            self.pending_removal[tile] = unit.pending_removal
+        else:
+            self.mobile_counts[unit.player_index, self._type_codes[unit.unit_type] - self.MOBILE_OFFSET, tile] += 1